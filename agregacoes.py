@@ -0,0 +1,292 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from cache import CacheLRU
+from texto import CATEGORIAS_EXECUCAO, TextoNormalizado, situacao_execucao
+
+COLUNA_SITUACAO = "SITUAÇÃO"
+COLUNA_MES = "Ano-Mês"
+
+# Dimensões de baixa cardinalidade que o cubo pode pré-agregar
+DIMENSOES_CUBO = [
+    "ANO DA EMENDA", "STATUS GERAL", "STATUS DA EMENDA", "PARLAMENTAR",
+    "PARTIDO DO PARLAMENTAR", "MUNICÍPIO", "MODALIDADE", COLUNA_SITUACAO, COLUNA_MES,
+]
+# Filtros de intervalo que o cubo consegue aplicar sem perder precisão
+INTERVALOS_CUBO = ["ANO DA EMENDA"]
+# Cuboides com mais células que esta fração das linhas não compensam (seriam quase
+# uma cópia do frame e o roll-up sairia mais caro que o scan): a consulta vai ao scan
+FRACAO_MAXIMA_CUBOIDE = 0.05
+
+
+class CuboAgregado:
+    """
+    Contagem e soma de VALOR pré-agregadas em cuboides: um por combinação das
+    DIMENSOES_CUBO que um gráfico agrupa mais as colunas que os filtros usam
+    (ex.: PARLAMENTAR x MUNICÍPIO). Cada cuboide é montado na primeira consulta
+    que precisa dele e reaproveitado por todas as sessões até a próxima versão;
+    combinações com mais de `fracao_maxima` das linhas ficam de fora. A situação
+    de execução vem de `texto` (normalizado na carga), se informado.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        texto: Optional[TextoNormalizado] = None,
+        fracao_maxima: float = FRACAO_MAXIMA_CUBOIDE,
+    ):
+        self._base = {c: df[c] for c in DIMENSOES_CUBO if c in df.columns}
+        if "EXECUÇÃO DA EMENDA" in df.columns:
+            self._base[COLUNA_SITUACAO] = (
+                texto.situacao if texto is not None else situacao_execucao(df["EXECUÇÃO DA EMENDA"])
+            )
+        if "DATA OB MS" in df.columns:
+            self._base[COLUNA_MES] = df["DATA OB MS"].dt.to_period("M").dt.to_timestamp()
+        self.dimensoes = list(self._base)
+        self.tem_valor = "VALOR" in df.columns
+        self._valor = df["VALOR"] if self.tem_valor else pd.Series(0.0, index=df.index)
+        self.linhas = len(df)
+        self.limite_celulas = max(1, int(len(df) * fracao_maxima))
+        self._distintos: Dict[str, int] = {}
+        self._cuboides: Dict[Tuple[str, ...], Optional[pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def _cabe(self, dimensoes: Tuple[str, ...]) -> bool:
+        """Descarta sem agrupar as combinações em que uma só dimensão já passa do limite"""
+        for d in dimensoes:
+            if d not in self._distintos:
+                self._distintos[d] = int(self._base[d].nunique(dropna=False))
+            if self._distintos[d] > self.limite_celulas:
+                return False
+        return True
+
+    def cuboide(self, dimensoes: Sequence[str]) -> Optional[pd.DataFrame]:
+        """Células agregadas por `dimensoes` (colunas QTD e VALOR); None se a combinação não compensa"""
+        chave = tuple(sorted(set(dimensoes)))
+        with self._lock:
+            if chave in self._cuboides:
+                return self._cuboides[chave]
+
+        celulas = None
+        if self._cabe(chave):
+            celulas = (
+                pd.DataFrame({**{d: self._base[d] for d in chave}, "_VALOR": self._valor})
+                .groupby(list(chave), observed=True, dropna=False, sort=False)
+                .agg(QTD=("_VALOR", "size"), VALOR=("_VALOR", "sum"))
+                .reset_index()
+            )
+            if len(celulas) > self.limite_celulas:
+                celulas = None
+        with self._lock:
+            return self._cuboides.setdefault(chave, celulas)
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Cuboides montados até agora e o total de células, para comparar com as linhas"""
+        with self._lock:
+            montados = [c for c in self._cuboides.values() if c is not None]
+            return {
+                "linhas": self.linhas,
+                "cuboides": len(montados),
+                "descartados": len(self._cuboides) - len(montados),
+                "células": sum(len(c) for c in montados),
+            }
+
+
+class ConsultaCubo:
+    """
+    Estado de filtros atual aplicado ao cubo; responde só o que o cubo cobre e,
+    se `linhas` (tamanho do frame filtrado) é informado, só quando o cuboide é
+    menor que o frame: para filtros seletivos, o scan das poucas linhas ganha.
+    """
+
+    def __init__(
+        self,
+        cubo: CuboAgregado,
+        filtros: Dict[str, Sequence],
+        intervalos: Optional[Dict[str, Tuple]] = None,
+        linhas: Optional[int] = None,
+    ):
+        self.cubo = cubo
+        self.filtros = filtros
+        self.intervalos = intervalos or {}
+        self.linhas = linhas
+        self.aplicavel = (
+            all(c in cubo.dimensoes for c in filtros)
+            and all(c in INTERVALOS_CUBO and c in cubo.dimensoes for c in self.intervalos)
+        )
+        self._celulas: Dict[Tuple[str, ...], Optional[pd.DataFrame]] = {}
+
+    def celulas(self, dimensoes: List[str]) -> Optional[pd.DataFrame]:
+        """Células do cuboide de `dimensoes` + colunas filtradas que passam pelos filtros (uma vez por consulta)"""
+        chave = tuple(sorted(set(dimensoes) | set(self.filtros) | set(self.intervalos)))
+        if chave not in self._celulas:
+            celulas = self.cubo.cuboide(chave)
+            if celulas is not None and self.linhas is not None and len(celulas) >= self.linhas:
+                celulas = None
+            if celulas is not None:
+                for coluna, valores in self.filtros.items():
+                    celulas = celulas[celulas[coluna].isin(valores)]
+                for coluna, (minimo, maximo) in self.intervalos.items():
+                    celulas = celulas[celulas[coluna].between(minimo, maximo)]
+            self._celulas[chave] = celulas
+        return self._celulas[chave]
+
+    def responde(self, dimensoes: List[str]) -> bool:
+        return (
+            self.aplicavel
+            and all(d in self.cubo.dimensoes for d in dimensoes)
+            and self.celulas(dimensoes) is not None
+        )
+
+    def agregar(self, dimensoes: List[str], soma_valor: bool, dropna: bool) -> pd.DataFrame:
+        """Roll-up para `dimensoes`, com a métrica na coluna "Métrica" (como nos scans)"""
+        medida = "VALOR" if soma_valor and self.cubo.tem_valor else "QTD"
+        return (
+            self.celulas(dimensoes)
+            .groupby(dimensoes, observed=True, dropna=dropna, as_index=False)[medida]
+            .sum()
+            .rename(columns={medida: "Métrica"})
+        )
+
+
+def agrega_por_dimensao(
+    df_base: pd.DataFrame, dim: str, how: str, consulta: Optional[ConsultaCubo] = None
+) -> pd.DataFrame:
+    """
+    Agrega valores por dimensão.
+    how: "Contagem" ou "Soma de VALOR"
+    """
+    if df_base.empty:
+        return pd.DataFrame(columns=[dim, "Métrica"])
+    soma = how == "Soma de VALOR" and "VALOR" in df_base.columns
+    if consulta is not None and consulta.responde([dim]):
+        out = consulta.agregar([dim], soma, dropna=False)
+    elif soma:
+        out = df_base.groupby(dim, dropna=False, as_index=False, observed=True)["VALOR"].sum().rename(columns={"VALOR": "Métrica"})
+    else:
+        out = df_base.groupby(dim, dropna=False, as_index=False, observed=True).size().rename(columns={"size": "Métrica"})
+    out[dim] = out[dim].astype(object).fillna("(Sem valor)")
+    return out.sort_values("Métrica", ascending=False)
+
+
+def agrupar_ano_status(df: pd.DataFrame, how: str, consulta: Optional[ConsultaCubo] = None) -> pd.DataFrame:
+    """Métrica por ANO DA EMENDA e STATUS GERAL (linhas sem ano ou status ficam de fora)."""
+    dims = ["ANO DA EMENDA", "STATUS GERAL"]
+    soma = how == "Soma de VALOR" and "VALOR" in df.columns
+    if consulta is not None and consulta.responde(dims):
+        return consulta.agregar(dims, soma, dropna=True)
+
+    base = df.dropna(subset=["ANO DA EMENDA"])
+    if soma:
+        return (
+            base.groupby(dims, as_index=False, observed=True)["VALOR"]
+            .sum()
+            .rename(columns={"VALOR": "Métrica"})
+        )
+    return (
+        base.groupby(dims, as_index=False, observed=True)
+        .size()
+        .rename(columns={"size": "Métrica"})
+    )
+
+
+def serie_mensal(df: pd.DataFrame, consulta: Optional[ConsultaCubo] = None) -> pd.DataFrame:
+    """Soma de VALOR (ou contagem, sem VALOR) por mês de DATA OB MS."""
+    soma = "VALOR" in df.columns
+    if consulta is not None and consulta.responde([COLUNA_MES]):
+        return consulta.agregar([COLUNA_MES], soma, dropna=True)
+
+    base_tempo = df.dropna(subset=["DATA OB MS"])
+    base_tempo = base_tempo.assign(**{COLUNA_MES: base_tempo["DATA OB MS"].dt.to_period("M").dt.to_timestamp()})
+    if soma:
+        return (base_tempo.groupby(COLUNA_MES, as_index=False)["VALOR"].sum()
+                .rename(columns={"VALOR": "Métrica"}))
+    return (base_tempo.groupby(COLUNA_MES, as_index=False).size()
+            .rename(columns={"size": "Métrica"}))
+
+
+def contar_execucoes(df: pd.DataFrame, consulta: Optional[ConsultaCubo] = None) -> pd.DataFrame:
+    """Quantidade de emendas por situação de execução padronizada."""
+    if consulta is not None and consulta.responde([COLUNA_SITUACAO]):
+        contagem = consulta.agregar([COLUNA_SITUACAO], False, dropna=True).set_index(COLUNA_SITUACAO)["Métrica"]
+    else:
+        contagem = situacao_execucao(df["EXECUÇÃO DA EMENDA"]).value_counts()
+
+    execucoes = contagem.reindex(CATEGORIAS_EXECUCAO, fill_value=0).reset_index()
+    execucoes.columns = ["SITUAÇÃO", "QUANTIDADE"]
+    return execucoes
+
+
+# Metades de cálculo dos gráficos: recebem o frame filtrado (e a consulta ao
+# cubo) e devolvem exatamente o frame que o gráfico desenha
+
+
+def dados_por_dimensao(
+    df: pd.DataFrame, dim: str, how: str, top_n: int, consulta: Optional[ConsultaCubo] = None
+) -> pd.DataFrame:
+    """Top N de `dim` pela métrica, com a métrica na coluna QUANTIDADE."""
+    base = agrega_por_dimensao(df, dim, how, consulta).head(top_n)
+    return base.rename(columns={"Métrica": "QUANTIDADE"})
+
+
+def dados_por_parlamentar(df: pd.DataFrame, top_n: int, consulta: Optional[ConsultaCubo] = None) -> pd.DataFrame:
+    """Top N parlamentares por soma de VALOR (ou contagem, sem VALOR)."""
+    metrica = "Soma de VALOR" if "VALOR" in df.columns else "Contagem"
+    return dados_por_dimensao(df, "PARLAMENTAR", metrica, top_n, consulta)
+
+
+def dados_ano_status(
+    df: pd.DataFrame, how: str, top_n_ano: int, consulta: Optional[ConsultaCubo] = None
+) -> pd.DataFrame:
+    """Métrica por ano e STATUS GERAL, só para os `top_n_ano` anos mais recentes."""
+    df_agg = agrupar_ano_status(df, how, consulta)
+    anos = sorted(df_agg["ANO DA EMENDA"].unique())[-top_n_ano:]
+    return df_agg[df_agg["ANO DA EMENDA"].isin(anos)].sort_values("ANO DA EMENDA")
+
+
+class ContextoAgregacao:
+    """
+    Agregações de um rerun sobre o frame filtrado. Cada (função, parâmetros) é
+    calculado no máximo uma vez por rerun, mesmo que vários gráficos/abas usem o
+    mesmo resultado; com `cache`, o resultado também é compartilhado entre
+    sessões com o mesmo estado de filtros (`chave`).
+    """
+
+    PREFIXO_CACHE = "agregacao"
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        consulta: Optional[ConsultaCubo] = None,
+        cache: Optional[CacheLRU] = None,
+        chave: Hashable = (),
+        versao: Optional[str] = None,
+    ):
+        self.df = df
+        self.consulta = consulta
+        self._cache = cache
+        self._chave = chave
+        self._versao = versao
+        self._resultados: Dict[Hashable, Any] = {}
+
+    def obter(self, funcao: Callable[..., Any], *parametros) -> Any:
+        """Resultado de `funcao(df, *parametros, consulta=...)` para o estado atual"""
+        chave = (funcao.__name__,) + parametros
+        if chave not in self._resultados:
+            calcular = lambda: funcao(self.df, *parametros, consulta=self.consulta)
+            if self._cache is None:
+                self._resultados[chave] = calcular()
+            else:
+                self._resultados[chave] = self._cache.obter(
+                    (self.PREFIXO_CACHE,) + chave + (self._chave,), calcular, versao=self._versao
+                )
+        return self._resultados[chave]
+
+    @classmethod
+    def filtros_da_chave(cls, chave: Hashable) -> Optional[Dict[str, Sequence]]:
+        """Filtros de seleção de uma chave de agregação no cache (None para outras chaves)"""
+        if not (isinstance(chave, tuple) and chave and chave[0] == cls.PREFIXO_CACHE):
+            return None
+        return dict(chave[-1][0])
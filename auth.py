@@ -2,15 +2,313 @@ import bcrypt
 import streamlit as st
 from typing import Optional, Dict
 import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from types import MappingProxyType
 import base64
+import hashlib
+import hmac
+from estaticos import ler_texto, logo_otimizado, static_servido
+
+# Resultados de AuthManager.autenticar
+LOGIN_OK = "ok"
+LOGIN_INVALIDO = "invalido"
+LOGIN_BLOQUEADO = "bloqueado"
+LOGIN_OCUPADO = "ocupado"
+
+BCRYPT_ROUNDS = 12
+
+# Token de sessão: guardado em cookie (fora da URL, do histórico e dos logs de
+# acesso) para sobreviver a reconexões; revogações persistem entre reinícios
+COOKIE_SESSAO = "emendas_sessao"
+VALIDADE_SESSAO = float(os.environ.get("EMENDAS_SESSAO_HORAS", 4)) * 3600
+ARQUIVO_SEGREDO = Path(".cache") / "sessao.chave"
+ARQUIVO_REVOGADOS = Path(".cache") / "sessao.revogados.json"
+
+class LimitadorTentativas:
+    """
+    Limite de falhas de login por chave (usuário ou IP): `max_falhas` dentro de
+    `janela` segundos bloqueiam a chave por `bloqueio` segundos.
+    """
+
+    def __init__(self, max_falhas: int = 5, janela: float = 300, bloqueio: float = 300):
+        self.max_falhas = max_falhas
+        self.janela = janela
+        self.bloqueio = bloqueio
+        self._falhas: Dict[str, deque] = {}
+        self._bloqueados: Dict[str, float] = {}  # chave -> fim do bloqueio
+        self._lock = threading.Lock()
+
+    def espera(self, *chaves: str) -> float:
+        """Segundos até as chaves poderem tentar de novo (0 se nenhuma está bloqueada)"""
+        agora = time.monotonic()
+        with self._lock:
+            fins = [self._bloqueados.get(c, 0) for c in chaves if c]
+        return max([fim - agora for fim in fins] + [0.0])
+
+    def registrar_falha(self, *chaves: str):
+        agora = time.monotonic()
+        with self._lock:
+            for chave in filter(None, chaves):
+                falhas = self._falhas.setdefault(chave, deque())
+                falhas.append(agora)
+                while falhas and falhas[0] < agora - self.janela:
+                    falhas.popleft()
+                if len(falhas) >= self.max_falhas:
+                    self._bloqueados[chave] = agora + self.bloqueio
+                    falhas.clear()
+            # Descarta chaves sem falhas recentes, para o estado não crescer sem limite
+            if len(self._falhas) > 10_000:
+                for chave in [c for c, f in self._falhas.items() if not f or f[-1] < agora - self.janela]:
+                    del self._falhas[chave]
+                for chave in [c for c, fim in self._bloqueados.items() if fim < agora]:
+                    del self._bloqueados[chave]
+
+    def limpar(self, *chaves: str):
+        with self._lock:
+            for chave in chaves:
+                self._falhas.pop(chave, None)
+                self._bloqueados.pop(chave, None)
+
+
+class VerificadorSenhas:
+    """
+    Executa bcrypt.checkpw em um pool de threads limitado (bcrypt libera o GIL),
+    para que rajadas de login não ocupem todos os núcleos e travem as demais
+    sessões. Verificações acima de `max_pendentes` são recusadas.
+
+    Usuários inexistentes são verificados contra um hash fictício com o mesmo
+    custo dos reais (tempo constante), gerado uma única vez no pool.
+    """
+
+    def __init__(self, max_workers: int, max_pendentes: Optional[int] = None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._vagas = threading.BoundedSemaphore(max_pendentes or max_workers * 8)
+        self._ficticio: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def aquecer(self) -> Future:
+        """Inicia (uma vez) a geração do hash fictício, sem esperar por ela"""
+        with self._lock:
+            if self._ficticio is None:
+                self._ficticio = self._pool.submit(_gerar_hash_ficticio)
+            return self._ficticio
+
+    def hash_ficticio(self) -> str:
+        return self.aquecer().result()
+
+    def verificar(self, password: str, hashed: str, timeout: float = 10) -> Optional[bool]:
+        """Resultado da verificação; None se o pool está saturado"""
+        if not self._vagas.acquire(timeout=timeout):
+            return None
+        try:
+            return self._pool.submit(_checkpw, password, hashed).result()
+        finally:
+            self._vagas.release()
+
+
+def _checkpw(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    except Exception:
+        return False
+
+
+def _gerar_hash_ficticio() -> str:
+    return bcrypt.hashpw(os.urandom(16), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
+
+
+# Compartilhados por todas as sessões do processo
+VERIFICADOR = VerificadorSenhas(int(os.environ.get("EMENDAS_BCRYPT_WORKERS", min(4, os.cpu_count() or 1))))
+LIMITADOR = LimitadorTentativas()
+VERIFICADOR.aquecer()  # já pronto no primeiro login de usuário inexistente
+
+def _segredo_sessao() -> bytes:
+    """
+    Chave HMAC dos tokens: EMENDAS_SESSAO_SEGREDO ou, sem ela, uma chave
+    aleatória gerada uma vez em ARQUIVO_SEGREDO (compartilhada entre processos).
+    """
+    segredo = os.environ.get("EMENDAS_SESSAO_SEGREDO")
+    if segredo:
+        return segredo.encode("utf-8")
+    ARQUIVO_SEGREDO.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(ARQUIVO_SEGREDO, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return ARQUIVO_SEGREDO.read_bytes()
+    with os.fdopen(fd, "wb") as arquivo:
+        chave = os.urandom(32)
+        arquivo.write(chave)
+    return chave
+
+
+class TokensSessao:
+    """
+    Tokens de sessão assinados (HMAC-SHA256 sobre usuário, perfil, validade e
+    id). A assinatura também cobre o hash da senha, então trocar a senha
+    invalida os tokens antigos. Os ids revogados no logout ficam em
+    `arquivo_revogados` até expirarem, valendo após reinícios e para todos os
+    processos que compartilham a pasta.
+    """
+
+    def __init__(self, segredo: bytes, validade: float = VALIDADE_SESSAO, arquivo_revogados: Optional[Path] = None):
+        self._segredo = segredo
+        self.validade = validade
+        self._arquivo = Path(arquivo_revogados) if arquivo_revogados else None
+        self._versao_arquivo = None  # (mtime, tamanho) da última leitura
+        self._revogados: Dict[str, float] = {}  # id -> validade
+        self._lock = threading.Lock()
+
+    def _assinatura(self, carga: str, hash_senha: str) -> str:
+        mensagem = f"cookie|{carga}|{hash_senha}".encode("utf-8")
+        return base64.urlsafe_b64encode(hmac.new(self._segredo, mensagem, hashlib.sha256).digest()).decode().rstrip("=")
+
+    def emitir(self, username: str, role: str, hash_senha: str) -> str:
+        carga = base64.urlsafe_b64encode(
+            json.dumps([username, role, int(time.time() + self.validade), os.urandom(9).hex()]).encode("utf-8")
+        ).decode().rstrip("=")
+        return f"{carga}.{self._assinatura(carga, hash_senha)}"
+
+    @staticmethod
+    def _carga(token: str) -> Optional[list]:
+        """[usuário, perfil, validade, id] do token, ou None se não decodifica ou os tipos não conferem"""
+        try:
+            carga = token.split(".", 1)[0]
+            dados = json.loads(base64.urlsafe_b64decode(carga + "=" * (-len(carga) % 4)))
+        except Exception:
+            return None
+        if not isinstance(dados, list) or len(dados) != 4:
+            return None
+        username, role, expira, identificador = dados
+        if not (isinstance(username, str) and isinstance(role, str) and isinstance(identificador, str)):
+            return None
+        if not isinstance(expira, int) or isinstance(expira, bool):
+            return None
+        return dados
+
+    def validar(self, token: str, auth_manager: "AuthManager") -> Optional[str]:
+        """Usuário do token, se a assinatura confere, não expirou, não foi revogado e o perfil não mudou"""
+        if not isinstance(token, str):
+            return None
+        dados = self._carga(token)
+        if dados is None:
+            return None
+        username, role, expira, identificador = dados
+        user = auth_manager.users.get(username)
+        if user is None:
+            return None
+        # A assinatura é conferida antes de usar qualquer outro campo da carga
+        carga, _, assinatura = token.partition(".")
+        if not hmac.compare_digest(assinatura.encode("utf-8"), self._assinatura(carga, user.get("password", "")).encode("utf-8")):
+            return None
+        if user.get("role") != role or expira < time.time():
+            return None
+        with self._lock:
+            self._sincronizar()
+            if identificador in self._revogados:
+                return None
+        return username
+
+    def _sincronizar(self):
+        """Incorpora as revogações gravadas por outros processos (chamado com o lock)"""
+        if self._arquivo is None:
+            return
+        try:
+            info = self._arquivo.stat()
+        except OSError:
+            return
+        if (info.st_mtime_ns, info.st_size) == self._versao_arquivo:
+            return
+        try:
+            self._revogados.update(json.loads(self._arquivo.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            return
+        self._versao_arquivo = (info.st_mtime_ns, info.st_size)
+
+    def revogar(self, token: str):
+        dados = self._carga(token)
+        if dados is None:
+            return
+        agora = time.time()
+        with self._lock:
+            self._sincronizar()
+            self._revogados[dados[3]] = dados[2]
+            for identificador in [i for i, expira in self._revogados.items() if expira < agora]:
+                del self._revogados[identificador]
+            if self._arquivo is not None:
+                self._arquivo.parent.mkdir(parents=True, exist_ok=True)
+                temporario = self._arquivo.with_suffix(".tmp")
+                temporario.write_text(json.dumps(self._revogados), encoding="utf-8")
+                os.replace(temporario, self._arquivo)
+                info = self._arquivo.stat()
+                self._versao_arquivo = (info.st_mtime_ns, info.st_size)
+
+
+@st.cache_resource(show_spinner=False)
+def obter_tokens() -> TokensSessao:
+    """Tokens de sessão do processo; a chave é lida (ou criada) no primeiro uso, não no import"""
+    return TokensSessao(_segredo_sessao(), arquivo_revogados=ARQUIVO_REVOGADOS)
 
 class AuthManager:
-    """Gerenciador de autenticação com bcrypt"""
+    """
+    Gerenciador de autenticação com bcrypt. Feito para uma instância por
+    processo: as credenciais são carregadas uma vez e recarregadas só quando
+    credentials.json ou os arquivos de secrets mudam (mtime/tamanho).
+    """
 
-    def __init__(self, credentials_file: str = "credentials.json"):
+    def __init__(self, credentials_file: str = "credentials.json", intervalo_verificacao: float = 2.0):
         self.credentials_file = Path(credentials_file)
+        self.intervalo_verificacao = intervalo_verificacao
+        self._lock = threading.Lock()
+        self._verificado_em = time.monotonic()
+        self._assinatura = self._assinatura_fontes()
         self.users = self._load_credentials()
+        self._infos = self._montar_infos(self.users)
+
+    def _arquivos_fonte(self) -> list:
+        try:
+            secrets = list(st.get_option("secrets.files") or [])
+        except Exception:
+            secrets = []
+        return [self.credentials_file] + [Path(p) for p in secrets]
+
+    def _assinatura_fontes(self) -> tuple:
+        """(arquivo, mtime, tamanho) das fontes de credenciais existentes"""
+        assinatura = []
+        for arquivo in self._arquivos_fonte():
+            try:
+                info = arquivo.stat()
+                assinatura.append((str(arquivo), info.st_mtime_ns, info.st_size))
+            except OSError:
+                assinatura.append((str(arquivo), None, None))
+        return tuple(assinatura)
+
+    @staticmethod
+    def _montar_infos(users: Dict) -> Dict[str, MappingProxyType]:
+        """Informações públicas (sem a senha) de cada usuário, montadas uma vez por carga"""
+        return {
+            username: MappingProxyType({k: v for k, v in dados.items() if k != "password"})
+            for username, dados in users.items()
+        }
+
+    def recarregar_se_mudou(self):
+        """Recarrega as credenciais se alguma fonte mudou (verificado no máximo a cada intervalo)"""
+        agora = time.monotonic()
+        if agora - self._verificado_em < self.intervalo_verificacao:
+            return
+        with self._lock:
+            if agora - self._verificado_em < self.intervalo_verificacao:
+                return
+            self._verificado_em = agora
+            assinatura = self._assinatura_fontes()
+            if assinatura == self._assinatura:
+                return
+            users = self._load_credentials()
+            self.users, self._infos, self._assinatura = users, self._montar_infos(users), assinatura
 
     def _load_credentials(self) -> Dict:
         """Carrega credenciais do arquivo JSON ou Streamlit Secrets"""
@@ -45,27 +343,47 @@ class AuthManager:
         """Salva credenciais no arquivo JSON"""
         with open(self.credentials_file, "w", encoding="utf-8") as f:
             json.dump(self.users, f, indent=4, ensure_ascii=False)
+        self._infos = self._montar_infos(self.users)
+        self._assinatura = self._assinatura_fontes()
 
     def hash_password(self, password: str) -> str:
         """Gera hash bcrypt da senha"""
-        salt = bcrypt.gensalt(rounds=12)
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
         hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
         return hashed.decode("utf-8")
 
     def verify_password(self, password: str, hashed: str) -> bool:
         """Verifica se a senha corresponde ao hash"""
-        try:
-            return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
-        except Exception:
-            return False
+        return _checkpw(password, hashed)
 
-    def authenticate(self, username: str, password: str) -> bool:
+    def authenticate(self, username: str, password: str, ip: Optional[str] = None) -> bool:
         """Autentica usuário"""
-        if username not in self.users:
-            return False
-
-        stored_hash = self.users[username]["password"]
-        return self.verify_password(password, stored_hash)
+        return self.autenticar(username, password, ip) == LOGIN_OK
+
+    def autenticar(self, username: str, password: str, ip: Optional[str] = None) -> str:
+        """
+        Autentica usuário fora da thread do script, com limite de tentativas por
+        usuário e por IP. Usuário inexistente também paga uma verificação bcrypt,
+        para não revelar pelo tempo de resposta quais usuários existem.
+        Retorna LOGIN_OK, LOGIN_INVALIDO, LOGIN_BLOQUEADO ou LOGIN_OCUPADO.
+        """
+        chaves = (f"usuario:{username}", f"ip:{ip}" if ip else "")
+        if LIMITADOR.espera(*chaves) > 0:
+            return LOGIN_BLOQUEADO
+
+        self.recarregar_se_mudou()
+
+        user = self.users.get(username)
+        stored_hash = user["password"] if user is not None else VERIFICADOR.hash_ficticio()
+        resultado = VERIFICADOR.verificar(password, stored_hash)
+        if resultado is None:
+            return LOGIN_OCUPADO
+        if resultado and user is not None:
+            LIMITADOR.limpar(chaves[0])
+            return LOGIN_OK
+
+        LIMITADOR.registrar_falha(*chaves)
+        return LOGIN_INVALIDO
 
     def add_user(self, username: str, password: str, name: str, role: str = "user"):
         """Adiciona novo usuário ao sistema"""
@@ -80,14 +398,19 @@ class AuthManager:
         self._save_credentials()
         return True
 
-    def get_user_info(self, username: str) -> Optional[Dict]:
-        """Retorna informações do usuário (sem a senha)"""
-        if username not in self.users:
-            return None
+    def emitir_token(self, username: str) -> str:
+        user = self.users[username]
+        return obter_tokens().emitir(username, user.get("role", "user"), user["password"])
 
-        user_info = self.users[username].copy()
-        user_info.pop("password", None)
-        return user_info
+    def validar_token(self, token: str) -> Optional[str]:
+        """Usuário de um token de sessão válido (sem bcrypt), ou None"""
+        self.recarregar_se_mudou()
+        return obter_tokens().validar(token, self)
+
+    def get_user_info(self, username: str) -> Optional[MappingProxyType]:
+        """Retorna informações do usuário (sem a senha), somente leitura e sem cópia"""
+        self.recarregar_se_mudou()
+        return self._infos.get(username)
 
 def init_session_state():
     """Inicializa variáveis de sessão"""
@@ -98,21 +421,45 @@ def init_session_state():
     if "user_info" not in st.session_state:
         st.session_state.user_info = None
 
+def gravar_cookie_sessao(token: str, validade: float):
+    """Grava no navegador (ou, com token vazio e validade 0, apaga) o cookie da sessão"""
+    cookie = f"{COOKIE_SESSAO}={token}; Path=/; Max-Age={int(validade)}; SameSite=Strict"
+    st.html(
+        f"""<script>
+        document.cookie = {json.dumps(cookie)} + (location.protocol === "https:" ? "; Secure" : "");
+        </script>""",
+        unsafe_allow_javascript=True,
+    )
+
+def token_do_navegador() -> Optional[str]:
+    """Token enviado pelo navegador ao abrir a sessão (cookie), se houver"""
+    return st.context.cookies.get(COOKIE_SESSAO)
+
+def iniciar_sessao(auth_manager: AuthManager, username: str, token: Optional[str] = None):
+    """Marca a sessão como autenticada; sem `token`, emite um, gravado no cookie no próximo rerun"""
+    st.session_state.authenticated = True
+    st.session_state.username = username
+    st.session_state.user_info = auth_manager.get_user_info(username)
+    if token is None:
+        token = auth_manager.emitir_token(username)
+        st.session_state.cookie_pendente = token
+    st.session_state.token_sessao = token
+
+def revogar_sessao():
+    """Revoga o token da sessão atual; o cookie é apagado quando o login volta a aparecer"""
+    token = st.session_state.get("token_sessao") or token_do_navegador()
+    if token:
+        obter_tokens().revogar(token)
+    st.session_state.pop("token_sessao", None)
+
 def logout():
     """Realiza logout do usuário"""
+    revogar_sessao()
     st.session_state.authenticated = False
     st.session_state.username = None
     st.session_state.user_info = None
     st.rerun()
 
-def get_image_base64(image_path: Path) -> str:
-    """Converte imagem para base64 para embedding no HTML"""
-    try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    except Exception:
-        return ""
-
 def login_form(
     auth_manager: AuthManager,
     logo_path: str = "logo.svg",
@@ -120,30 +467,18 @@ def login_form(
 ):
     """Renderiza formulário de login minimalista com suporte a logo SVG e CSS externo"""
 
-    # === Carrega CSS externo ===
-    try:
-        with open(css_path, "r", encoding="utf-8") as f:
-            css_content = f.read()
+    # === Carrega CSS externo (lido uma vez por processo) ===
+    css_content = ler_texto(css_path)
+    if css_content is not None:
         st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
-    except FileNotFoundError:
+    else:
         st.warning("⚠️ Arquivo CSS não encontrado. O layout pode ficar diferente do esperado.")
 
-    # --- Carrega logo ---
-    logo_html = ""
-    logo_file = Path(logo_path)
-
-    if logo_file.exists():
-        if logo_file.suffix.lower() == ".svg":
-            with open(logo_file, "r", encoding="utf-8") as f:
-                svg_content = f.read()
-                logo_html = f'<div class="logo-section">{svg_content}</div>'
-        else:
-            logo_b64 = get_image_base64(logo_file)
-            logo_html = f"""
-            <div class="logo-section">
-                <img src="data:image/png;base64,{logo_b64}" alt="Logo" />
-            </div>
-            """
+    # --- Carrega logo (versão otimizada, servida por referência) ---
+    logo = logo_otimizado(logo_path)
+
+    if logo is not None:
+        logo_html = f'<div class="logo-section">{logo.img(static_servido())}</div>'
     else:
         logo_html = "<h2 style='text-align:center;'>Secretaria da Saúde - PE</h2>"
 
@@ -171,13 +506,20 @@ def login_form(
                     st.error("❌ Por favor, preencha todos os campos")
                     return False
 
-                if auth_manager.authenticate(username, password):
-                    st.session_state.authenticated = True
-                    st.session_state.username = username
-                    st.session_state.user_info = auth_manager.get_user_info(username)
+                ip = getattr(st.context, "ip_address", None)
+                resultado = auth_manager.autenticar(username, password, ip)
+                if resultado == LOGIN_OK:
+                    iniciar_sessao(auth_manager, username)
                     st.success("✅ Login realizado com sucesso!")
                     st.balloons()
                     st.rerun()
+                elif resultado == LOGIN_BLOQUEADO:
+                    espera = LIMITADOR.espera(f"usuario:{username}", f"ip:{ip}" if ip else "")
+                    st.error(f"⛔ Muitas tentativas. Tente novamente em {max(1, int(espera // 60) + 1)} min.")
+                    return False
+                elif resultado == LOGIN_OCUPADO:
+                    st.error("⏳ Muitos acessos simultâneos. Tente novamente em instantes.")
+                    return False
                 else:
                     st.error("❌ Usuário ou senha incorretos")
                     return False
@@ -217,7 +559,18 @@ def require_authentication(auth_manager: AuthManager, logo_path: str = "logo.svg
     init_session_state()
 
     if not st.session_state.authenticated:
+        # Nova sessão (reconexão, recarga da página): aceita o token do cookie sem bcrypt
+        token = token_do_navegador()
+        username = auth_manager.validar_token(token) if token else None
+        if username is not None:
+            iniciar_sessao(auth_manager, username, token)
+            return True
+        # Sem sessão válida, qualquer cookie que o navegador tenha é inútil (expirado ou revogado)
+        gravar_cookie_sessao("", 0)
         login_form(auth_manager, logo_path)
         st.stop()
 
+    token = st.session_state.pop("cookie_pendente", None)
+    if token:
+        gravar_cookie_sessao(token, obter_tokens().validade)
     return True
@@ -0,0 +1,180 @@
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agregacoes import COLUNA_MES, COLUNA_SITUACAO
+from texto import TextoNormalizado, situacao_execucao
+
+DIRETORIO_BANCOS = Path(".cache") / "sql"
+MOTORES_SQL = ("duckdb", "sqlite")
+TABELA = "emendas"
+COLUNA_LINHA = "_linha"
+
+
+def _coluna(nome: str) -> str:
+    return '"' + nome.replace('"', '""') + '"'
+
+
+def _parametro(valor):
+    """Valor Python aceito pelos dois motores (datas viram ns desde a época, como na tabela)"""
+    if isinstance(valor, (pd.Timestamp, np.datetime64)) or hasattr(valor, "isoformat"):
+        return pd.Timestamp(valor).value
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+class BancoSQL:
+    """
+    Cópia de uma versão dos dados em um banco analítico embutido (DuckDB ou
+    SQLite, em arquivo local), com os filtros da barra lateral e as agregações
+    dos gráficos traduzidos para SQL. Datas ficam como inteiros (ns desde a
+    época) e cada linha guarda sua posição no frame em COLUNA_LINHA. A situação
+    de execução vem de `texto` (normalizado na carga), se informado.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        versao: str,
+        motor: str = "duckdb",
+        diretorio: Path = DIRETORIO_BANCOS,
+        texto: Optional[TextoNormalizado] = None,
+    ):
+        if motor not in MOTORES_SQL:
+            raise ValueError(f"Motor SQL desconhecido: {motor} (use {', '.join(MOTORES_SQL)})")
+        self.motor = motor
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.caminho = self.diretorio / f"{versao[:16] or 'dados'}.{motor}"
+        self._lock = threading.Lock()
+
+        self.tipos: Dict[str, str] = {}  # coluna -> "data", "inteiro" ou "texto"/"número"
+        tabela = {COLUNA_LINHA: np.arange(len(df), dtype=np.int64)}
+        colunas = dict(df.items())
+        if "EXECUÇÃO DA EMENDA" in df.columns:
+            colunas[COLUNA_SITUACAO] = (
+                texto.situacao if texto is not None else situacao_execucao(df["EXECUÇÃO DA EMENDA"])
+            )
+        if "DATA OB MS" in df.columns:
+            colunas[COLUNA_MES] = df["DATA OB MS"].dt.to_period("M").dt.to_timestamp()
+        for nome, serie in colunas.items():
+            if pd.api.types.is_datetime64_any_dtype(serie):
+                self.tipos[nome] = "data"
+                tabela[nome] = serie.astype("datetime64[ns]").astype("int64").where(serie.notna(), None).astype(object)
+            elif pd.api.types.is_integer_dtype(serie):
+                self.tipos[nome] = "inteiro"
+                tabela[nome] = serie.astype("Int64")
+            elif pd.api.types.is_float_dtype(serie):
+                self.tipos[nome] = "número"
+                tabela[nome] = serie
+            else:
+                self.tipos[nome] = "texto"
+                tabela[nome] = serie.astype(object).where(serie.notna(), None)
+        tabela = pd.DataFrame(tabela)
+
+        # Um arquivo por versão; os de versões anteriores não são mais consultados
+        for antigo in self.diretorio.glob(f"*.{motor}*"):
+            antigo.unlink(missing_ok=True)
+        if motor == "duckdb":
+            import duckdb  # opcional: só é exigido com EMENDAS_BACKEND=duckdb
+
+            self._con = duckdb.connect(str(self.caminho))
+            self._con.register("_carga", tabela)
+            self._con.execute(f"CREATE TABLE {TABELA} AS SELECT * FROM _carga")
+            self._con.unregister("_carga")
+        else:
+            import sqlite3
+
+            self._con = sqlite3.connect(str(self.caminho), check_same_thread=False)
+            tabela.to_sql(TABELA, self._con, index=False)
+            for nome in colunas:
+                if self.tipos[nome] != "número":
+                    self._con.execute(f"CREATE INDEX {_coluna('ix_' + nome)} ON {TABELA} ({_coluna(nome)})")
+            self._con.commit()
+
+    def _consultar(self, sql: str, parametros: Sequence) -> pd.DataFrame:
+        with self._lock:
+            if self.motor == "duckdb":
+                return self._con.execute(sql, list(parametros)).df()
+            return pd.read_sql_query(sql, self._con, params=list(parametros))
+
+    @staticmethod
+    def _where(
+        filtros: Dict[str, Sequence], intervalos: Optional[Dict[str, Tuple]] = None
+    ) -> Tuple[List[str], List]:
+        condicoes, parametros = [], []
+        for coluna, valores in filtros.items():
+            condicoes.append(f"{_coluna(coluna)} IN ({', '.join('?' * len(valores))})")
+            parametros.extend(_parametro(v) for v in valores)
+        for coluna, (minimo, maximo) in (intervalos or {}).items():
+            condicoes.append(f"{_coluna(coluna)} BETWEEN ? AND ?")
+            parametros.extend([_parametro(minimo), _parametro(maximo)])
+        return condicoes, parametros
+
+    def filtrar(
+        self, filtros: Dict[str, Sequence], intervalos: Optional[Dict[str, Tuple]] = None
+    ) -> Optional[np.ndarray]:
+        """Posições das linhas que atendem aos filtros, como MotorFiltros.filtrar"""
+        condicoes, parametros = self._where(filtros, intervalos)
+        if not condicoes:
+            return None
+        sql = f"SELECT {COLUNA_LINHA} FROM {TABELA} WHERE {' AND '.join(condicoes)} ORDER BY {COLUNA_LINHA}"
+        return self._consultar(sql, parametros)[COLUNA_LINHA].to_numpy(dtype=np.intp)
+
+    def agregar(
+        self,
+        dimensoes: List[str],
+        soma_valor: bool,
+        dropna: bool,
+        filtros: Dict[str, Sequence],
+        intervalos: Optional[Dict[str, Tuple]] = None,
+    ) -> pd.DataFrame:
+        """GROUP BY `dimensoes`, com a métrica na coluna "Métrica" (como nos scans)"""
+        condicoes, parametros = self._where(filtros, intervalos)
+        if dropna:
+            condicoes += [f"{_coluna(d)} IS NOT NULL" for d in dimensoes]
+        colunas = ", ".join(_coluna(d) for d in dimensoes)
+        medida = "COALESCE(SUM(\"VALOR\"), 0)" if soma_valor and "VALOR" in self.tipos else "COUNT(*)"
+        sql = (
+            f"SELECT {colunas}, {medida} AS \"Métrica\" FROM {TABELA}"
+            + (f" WHERE {' AND '.join(condicoes)}" if condicoes else "")
+            + f" GROUP BY {colunas} ORDER BY {colunas}"
+        )
+        out = self._consultar(sql, parametros)
+        for d in dimensoes:
+            if self.tipos[d] == "data":
+                out[d] = pd.to_datetime(out[d], unit="ns")
+            elif self.tipos[d] == "inteiro":
+                out[d] = out[d].astype("Int64")
+            elif self.tipos[d] == "texto":
+                out[d] = out[d].astype(object).where(out[d].notna(), None)
+        return out
+
+    def fechar(self):
+        with self._lock:
+            self._con.close()
+
+
+class ConsultaSQL:
+    """Estado de filtros atual aplicado ao BancoSQL, com a mesma interface de ConsultaCubo"""
+
+    def __init__(
+        self,
+        banco: BancoSQL,
+        filtros: Dict[str, Sequence],
+        intervalos: Optional[Dict[str, Tuple]] = None,
+    ):
+        self.banco = banco
+        self.filtros = filtros
+        self.intervalos = intervalos or {}
+        self.aplicavel = True
+
+    def responde(self, dimensoes: List[str]) -> bool:
+        return all(d in self.banco.tipos for d in dimensoes)
+
+    def agregar(self, dimensoes: List[str], soma_valor: bool, dropna: bool) -> pd.DataFrame:
+        return self.banco.agregar(dimensoes, soma_valor, dropna, self.filtros, self.intervalos)
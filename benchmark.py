@@ -0,0 +1,311 @@
+import json
+import multiprocessing as mp
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from agregacoes import (
+    ConsultaCubo, CuboAgregado, agrega_por_dimensao, agrupar_ano_status, contar_execucoes, serie_mensal
+)
+from banco_sql import MOTORES_SQL, BancoSQL, ConsultaSQL
+from busca import COLUNAS_BUSCA, IndiceBusca
+from dados import COLUNAS_DESEJADAS, ler_csv, ler_csv_tipado
+from filtros import MotorFiltros
+from texto import TextoNormalizado, normalizar_txt
+
+TAMANHOS_PADRAO = [100_000, 1_000_000]
+PADROES = {"login": [1, 8, 32]}  # logins simultâneos
+
+
+def gerar_csv_sintetico(linhas: int, caminho: Path, semente: int = 42):
+    """Gera uma exportação sintética no formato da planilha de emendas"""
+    rng = np.random.default_rng(semente)
+    escolha = lambda valores: np.array(valores, dtype=object)[rng.integers(0, len(valores), linhas)]
+
+    df = pd.DataFrame({
+        "STATUS GERAL": escolha(["CONCLUÍDO", "EM ANÁLISE", "PENDENTE", "CANCELADO"]),
+        "STATUS DA EMENDA": escolha(["PAGA", "APROVADA", "EM DILIGÊNCIA", ""]),
+        "ANO DA EMENDA": rng.integers(2018, 2026, linhas),
+        "Nº EMENDA": np.char.add("E", np.arange(linhas).astype(str)),
+        "Nº REMANEJAMENTO": escolha(["", "R1", "R2"]),
+        "SIGEPE / SEI": np.char.add("SEI-", rng.integers(0, 10**7, linhas).astype(str)),
+        "DATA OB MS": pd.to_datetime(rng.integers(1_600_000_000, 1_750_000_000, linhas), unit="s").strftime("%d/%m/%Y"),
+        "MUNICÍPIO": escolha([f"Município {i}" for i in range(185)]),
+        "ENTIDADE": escolha([f"Entidade {i}" for i in range(2000)]),
+        "SUBAÇÃO": escolha(["Custeio PAB", "Custeio MAC", "Investimento"]),
+        "GRUPO DE DESPESA": escolha(["3", "4"]),
+        "MODALIDADE": escolha(["Fundo a Fundo", "Convênio"]),
+        "VALOR": rng.uniform(1_000, 2_000_000, linhas).round(2),
+        "PARLAMENTAR": escolha([f"Dep. {i}" for i in range(49)]),
+        "PARTIDO DO PARLAMENTAR": escolha(["PSB", "PT", "PL", "PP", "MDB"]),
+        "PENDÊNCIAS": escolha(["", "Falta certidão", "Aguardando plano de trabalho"]),
+        "SETOR ATUAL ROBÔ": escolha(["GAB", "FIN", "JUR"]),
+        "EXECUÇÃO DA EMENDA": escolha(["Executada", "Em execução", "Não executada", ""]),
+        "OBSERVAÇÕES": escolha(["", "texto livre de acompanhamento " * 3]),
+    })
+    df.to_csv(caminho, index=False)
+
+
+def _leitura_atual(caminho: Path) -> pd.DataFrame:
+    """Leitura como era feita antes: CSV inteiro + limpeza a cada rerun"""
+    df = ler_csv(caminho)
+    df = df[[c for c in COLUNAS_DESEJADAS if c in df.columns]].copy()
+    df["VALOR"] = pd.to_numeric(df["VALOR"], errors="coerce")
+    df["DATA OB MS"] = pd.to_datetime(df["DATA OB MS"], errors="coerce", dayfirst=True)
+    return df
+
+
+LEITORES = {
+    "atual": _leitura_atual,
+    "tipado": ler_csv_tipado,
+    "em blocos (64 MB)": lambda caminho: ler_csv_tipado(caminho, orcamento_mb=64),
+}
+
+
+def _pico_rss_kb() -> int:
+    """Pico de RSS do processo em kB (VmHWM; ru_maxrss herda o pico do processo pai)"""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _medir(nome: str, caminho: Path, fila):
+    base = _pico_rss_kb()
+    inicio = time.perf_counter()
+    df = LEITORES[nome](caminho)
+    duracao = time.perf_counter() - inicio
+    pico = _pico_rss_kb()
+    fila.put((duracao, (pico - base) / 1024, df.memory_usage(deep=True).sum() / 1024**2))
+
+
+def medir(nome: str, caminho: Path):
+    """Roda o leitor em um processo novo e retorna (segundos, pico RSS MB, frame MB)"""
+    ctx = mp.get_context("spawn")
+    fila = ctx.Queue()
+    proc = ctx.Process(target=_medir, args=(nome, caminho, fila))
+    proc.start()
+    resultado = fila.get()
+    proc.join()
+    return resultado
+
+
+def benchmark_ingestao(tamanhos):
+    print("\n" + "=" * 60)
+    print("📥 INGESTÃO: pico de RSS por leitor")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        for linhas in tamanhos:
+            caminho = Path(tmp) / f"emendas_{linhas}.csv"
+            gerar_csv_sintetico(linhas, caminho)
+            tamanho_mb = caminho.stat().st_size / 1024**2
+            print(f"\n{linhas:,} linhas ({tamanho_mb:.0f} MB de CSV)")
+            for nome in LEITORES:
+                duracao, pico, final = medir(nome, caminho)
+                print(f"   {nome:<20} {duracao:7.2f}s   pico +{pico:8.1f} MB   frame {final:8.1f} MB")
+
+
+def _cronometrar(funcao, repeticoes: int = 5) -> float:
+    """Menor tempo (ms) entre `repeticoes` execuções"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+
+def _graficos(df: pd.DataFrame, consulta=None):
+    """As agregações que o painel faz a cada rerun"""
+    agrega_por_dimensao(df, "PARLAMENTAR", "Soma de VALOR", consulta)
+    agrega_por_dimensao(df, "MUNICÍPIO", "Contagem", consulta)
+    agrupar_ano_status(df, "Contagem", consulta)
+    serie_mensal(df, consulta)
+    contar_execucoes(df, consulta)
+
+
+def benchmark_cubo(tamanhos):
+    print("\n" + "=" * 60)
+    print("🧊 AGREGAÇÕES: scan das linhas x roll-up do cubo")
+    print("=" * 60)
+    cenarios = {
+        "sem filtros": ({}, {}),
+        "1 parlamentar": ({"PARLAMENTAR": ["Dep. 7"]}, {}),
+        "3 municípios + ano": ({"MUNICÍPIO": ["Município 1", "Município 2", "Município 3"]}, {"ANO DA EMENDA": (2022, 2024)}),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for linhas in tamanhos:
+            caminho = Path(tmp) / f"emendas_{linhas}.csv"
+            gerar_csv_sintetico(linhas, caminho)
+            df = ler_csv_tipado(caminho)
+            cubo = CuboAgregado(df)
+            motor = MotorFiltros(df, ["PARLAMENTAR", "MUNICÍPIO"], ["ANO DA EMENDA"])
+            print(f"\n{linhas:,} linhas")
+            for nome, (filtros, intervalos) in cenarios.items():
+                sub = motor.frame(motor.filtrar(filtros, intervalos))
+                inicio = time.perf_counter()
+                _graficos(sub, ConsultaCubo(cubo, filtros, intervalos, len(sub)))  # monta os cuboides que faltam
+                montagem = (time.perf_counter() - inicio) * 1000
+                scan = _cronometrar(lambda: _graficos(sub))
+                rollup = _cronometrar(lambda: _graficos(sub, ConsultaCubo(cubo, filtros, intervalos, len(sub))))
+                print(f"   {nome:<22} scan {scan:8.1f} ms   cubo {rollup:8.1f} ms   (1ª consulta {montagem:8.1f} ms)")
+            estatisticas = cubo.estatisticas()
+            print(
+                f"   cubo: {estatisticas['cuboides']} cuboides, {estatisticas['células']:,} células "
+                f"({estatisticas['células'] / linhas:.1%} das linhas); {estatisticas['descartados']} combinações descartadas"
+            )
+
+
+def _busca_ingenua(df: pd.DataFrame, texto: str) -> np.ndarray:
+    """str.contains linha a linha sobre o texto normalizado, como referência de tempo"""
+    selecionadas = np.ones(len(df), dtype=bool)
+    for termo in normalizar_txt(texto).split():
+        linhas = np.zeros(len(df), dtype=bool)
+        for coluna in COLUNAS_BUSCA:
+            normalizado = df[coluna].astype(object).map(normalizar_txt, na_action="ignore")
+            linhas |= normalizado.str.contains(termo, regex=False).fillna(False).to_numpy(dtype=bool)
+        selecionadas &= linhas
+    return np.flatnonzero(selecionadas)
+
+
+def benchmark_busca(tamanhos):
+    print("\n" + "=" * 60)
+    print("🔎 BUSCA: índice de trigramas x str.contains; paridade em tests/test_busca.py")
+    print("=" * 60)
+    consultas = ["entidade 15", "CERTIDÃO", "pab", "plano trabalho 7"]
+    with tempfile.TemporaryDirectory() as tmp:
+        for linhas in tamanhos:
+            caminho = Path(tmp) / f"emendas_{linhas}.csv"
+            gerar_csv_sintetico(linhas, caminho)
+            df = ler_csv_tipado(caminho)
+            inicio = time.perf_counter()
+            indice = IndiceBusca(TextoNormalizado(df))
+            construcao = time.perf_counter() - inicio
+            print(f"\n{linhas:,} linhas — índice construído em {construcao:.2f}s")
+            for consulta in consultas:
+                resultado = indice.buscar(consulta)
+                rapida = _cronometrar(lambda: indice.buscar(consulta))
+                ingenua = _cronometrar(lambda: _busca_ingenua(df, consulta), repeticoes=1)
+                print(f"   {consulta!r:<22} {len(resultado):>9,} linhas   índice {rapida:8.1f} ms   str.contains {ingenua:8.1f} ms")
+
+
+def benchmark_sql(tamanhos):
+    print("\n" + "=" * 60)
+    print("🗄️ BACKEND SQL: tempo x pandas (índices + cubo); paridade em tests/test_banco_sql.py")
+    print("=" * 60)
+    cenarios = {
+        "sem filtros": ({}, {}),
+        "1 parlamentar": ({"PARLAMENTAR": ["Dep. 7"]}, {}),
+        "3 municípios + ano + valor": (
+            {"MUNICÍPIO": ["Município 1", "Município 2", "Município 3"]},
+            {"ANO DA EMENDA": (2022, 2024), "VALOR": (10_000.0, 900_000.0)},
+        ),
+        "data OB": ({"STATUS GERAL": ["PENDENTE"]}, {"DATA OB MS": (pd.Timestamp(2022, 1, 1).date(), pd.Timestamp(2023, 6, 30).date())}),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for linhas in tamanhos:
+            caminho = Path(tmp) / f"emendas_{linhas}.csv"
+            gerar_csv_sintetico(linhas, caminho)
+            df = ler_csv_tipado(caminho)
+            motor = MotorFiltros(df, ["PARLAMENTAR", "MUNICÍPIO", "STATUS GERAL"], ["ANO DA EMENDA", "VALOR", "DATA OB MS"])
+            cubo = CuboAgregado(df)
+            print(f"\n{linhas:,} linhas")
+            for nome_motor in MOTORES_SQL:
+                try:
+                    inicio = time.perf_counter()
+                    banco = BancoSQL(df, f"bench{linhas}", motor=nome_motor, diretorio=Path(tmp) / "sql")
+                except ImportError as e:
+                    print(f"   {nome_motor}: indisponível ({e})")
+                    continue
+                print(f"   {nome_motor}: carga em {time.perf_counter() - inicio:.2f}s")
+                for nome, (filtros, intervalos) in cenarios.items():
+                    sub = motor.frame(motor.filtrar(filtros, intervalos))
+                    consulta = ConsultaSQL(banco, filtros, intervalos)
+                    pandas_ms = _cronometrar(lambda: (
+                        motor.filtrar(filtros, intervalos),
+                        _graficos(sub, ConsultaCubo(cubo, filtros, intervalos, len(sub))),
+                    ))
+                    sql_ms = _cronometrar(lambda: (banco.filtrar(filtros, intervalos), _graficos(sub, consulta)))
+                    print(f"      {nome:<28} pandas {pandas_ms:8.1f} ms   {nome_motor} {sql_ms:8.1f} ms")
+                banco.fechar()
+
+
+def _rajada_login(autenticar, logins: int, concorrencia: int):
+    """Dispara `logins` autenticações com `concorrencia` sessões simultâneas; retorna (logins/s, p95 ms, pior ms de outra sessão)"""
+    latencias = []
+    # Uma "outra sessão" que só faz trabalho leve de Python durante a rajada
+    parar = threading.Event()
+    atrasos = []
+
+    def outra_sessao():
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            sum(range(20_000))
+            atrasos.append(time.perf_counter() - inicio)
+
+    def login(i):
+        inicio = time.perf_counter()
+        autenticar(i)
+        latencias.append(time.perf_counter() - inicio)
+
+    vizinha = threading.Thread(target=outra_sessao)
+    vizinha.start()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as sessoes:
+        list(sessoes.map(login, range(logins)))
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    vizinha.join()
+    return logins / duracao, np.percentile(latencias, 95) * 1000, max(atrasos) * 1000
+
+
+def benchmark_login(concorrencias):
+    from auth import AuthManager, LOGIN_OK, _checkpw
+
+    print("\n" + "=" * 60)
+    print("🔐 LOGIN: bcrypt inline x pool limitado")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = Path(tmp) / "credentials.json"
+        arquivo.write_text(json.dumps({}), encoding="utf-8")
+        auth = AuthManager(credentials_file=str(arquivo))
+        auth.add_user("bench", "senha-bench", "Benchmark")
+        hash_bench = auth.users["bench"]["password"]
+        for concorrencia in concorrencias:
+            logins = max(concorrencia, 8)
+            print(f"\n{concorrencia} logins simultâneos ({logins} no total)")
+            inline = _rajada_login(lambda i: _checkpw("senha-bench", hash_bench), logins, concorrencia)
+            pool = _rajada_login(
+                lambda i: auth.autenticar("bench", "senha-bench", ip=f"10.0.0.{i}") == LOGIN_OK, logins, concorrencia
+            )
+            for nome, (vazao, p95, vizinha) in (("inline", inline), ("pool", pool)):
+                print(f"   {nome:<8} {vazao:6.1f} logins/s   p95 {p95:8.1f} ms   pior atraso de outra sessão {vizinha:7.1f} ms")
+
+
+BENCHMARKS = {
+    "ingestao": benchmark_ingestao,
+    "cubo": benchmark_cubo,
+    "busca": benchmark_busca,
+    "sql": benchmark_sql,
+    "login": benchmark_login,
+}
+
+
+if __name__ == "__main__":
+    # python benchmark.py [nome] [linhas ...]  (sem nome, roda todos; em "login", os números são logins simultâneos)
+    argumentos = sys.argv[1:]
+    nomes = [argumentos.pop(0)] if argumentos and argumentos[0] in BENCHMARKS else list(BENCHMARKS)
+    tamanhos = [int(n) for n in argumentos]
+    for nome in nomes:
+        BENCHMARKS[nome](tamanhos or PADROES.get(nome, TAMANHOS_PADRAO))
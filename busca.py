@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from texto import COLUNAS_TEXTO, TextoNormalizado, normalizar_txt
+
+COLUNAS_BUSCA = COLUNAS_TEXTO
+TAMANHO_GRAMA = 3
+
+
+def _gramas(texto: str) -> set:
+    return {texto[i:i + TAMANHO_GRAMA] for i in range(len(texto) - TAMANHO_GRAMA + 1)}
+
+
+class IndiceBusca:
+    """
+    Busca por trecho de texto, sem diferenciar acentos ou caixa, nas colunas de
+    COLUNAS_BUSCA. O índice invertido de trigramas é montado uma vez por versão
+    e só sobre as chaves normalizadas distintas (TextoNormalizado); as linhas
+    saem dos códigos canônicos de cada coluna, sem varrer texto linha a linha.
+    """
+
+    def __init__(self, texto: TextoNormalizado, colunas: Sequence[str] = COLUNAS_BUSCA):
+        self._chaves: Dict[str, List[str]] = {}
+        self._codigos: Dict[str, np.ndarray] = {}
+        self._gramas: Dict[str, Dict[str, np.ndarray]] = {}
+        for coluna in colunas:
+            if coluna not in texto.chaves:
+                continue
+            chaves = list(texto.chaves[coluna].cat.categories)
+            indice: Dict[str, list] = {}
+            for i, chave in enumerate(chaves):
+                for grama in _gramas(chave):
+                    indice.setdefault(grama, []).append(i)
+            self._chaves[coluna] = chaves
+            self._codigos[coluna] = texto.codigos(coluna)
+            self._gramas[coluna] = {g: np.array(ids, dtype=np.int64) for g, ids in indice.items()}
+
+    @property
+    def colunas(self) -> List[str]:
+        return list(self._chaves)
+
+    def chaves_com(self, coluna: str, termo: str) -> np.ndarray:
+        """Ids das chaves da coluna que contêm `termo` (já normalizado, sem espaços)"""
+        chaves = self._chaves[coluna]
+        if len(termo) < TAMANHO_GRAMA:
+            candidatos = range(len(chaves))
+        else:
+            candidatos = None
+            for grama in sorted(_gramas(termo), key=lambda g: len(self._gramas[coluna].get(g, ()))):
+                ids = self._gramas[coluna].get(grama)
+                if ids is None:
+                    return np.array([], dtype=np.int64)
+                candidatos = ids if candidatos is None else np.intersect1d(candidatos, ids, assume_unique=True)
+                if not len(candidatos):
+                    return candidatos
+        return np.array([i for i in candidatos if termo in chaves[i]], dtype=np.int64)
+
+    def buscar(self, texto: str) -> Optional[np.ndarray]:
+        """
+        Posições (crescentes) das linhas em que cada palavra de `texto` aparece
+        em pelo menos uma das colunas; None quando não há o que buscar.
+        """
+        termos = normalizar_txt(texto).split()
+        if not termos or not self._chaves:
+            return None
+        selecionadas = None
+        for termo in termos:
+            linhas = None
+            for coluna, codigos in self._codigos.items():
+                # Tabela chave -> casou; o último item atende o código -1 (nulos)
+                tabela = np.zeros(len(self._chaves[coluna]) + 1, dtype=bool)
+                tabela[self.chaves_com(coluna, termo)] = True
+                casou = tabela[codigos]
+                linhas = casou if linhas is None else linhas | casou
+            selecionadas = linhas if selecionadas is None else selecionadas & linhas
+        return np.flatnonzero(selecionadas)
@@ -0,0 +1,149 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def estimar_tamanho(valor: Any) -> int:
+    """Tamanho aproximado em bytes de um resultado guardado no cache"""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, (bytes, str)):
+        return len(valor)
+    if isinstance(valor, (tuple, list)):
+        return sum(estimar_tamanho(v) for v in valor) + sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        return sum(estimar_tamanho(v) for v in valor.values()) + sys.getsizeof(valor)
+    return sys.getsizeof(valor)
+
+
+def impressao_frame(df: pd.DataFrame) -> str:
+    """Hash do conteúdo de um frame (colunas, tipos e valores), para chaves de cache"""
+    h = hashlib.sha1(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class CacheLRU:
+    """
+    Cache LRU compartilhado entre sessões e limitado pelo tamanho estimado dos
+    itens. Quando informada, a versão dos dados faz parte do estado do cache:
+    ao chegar uma versão nova, todos os itens da versão anterior são descartados.
+    Pedidos de versões já substituídas (ex.: fragments reexecutados com os
+    argumentos do último rerun completo) são calculados sem passar pelo cache,
+    para não derrubar os itens da versão atual.
+    """
+
+    def __init__(self, max_bytes: int, tamanho: Callable[[Any], int] = estimar_tamanho, max_versoes_antigas: int = 32):
+        self.max_bytes = max_bytes
+        self._tamanho = tamanho
+        self._itens: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._versao: Optional[str] = None
+        self._antigas: "OrderedDict[str, None]" = OrderedDict()  # versões substituídas, da mais antiga à mais recente
+        self._max_versoes_antigas = max_versoes_antigas
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+        self.invalidacoes = 0
+        self.desatualizados = 0
+        self.preservados = 0
+
+    def _aposentar_versao(self, versao: str):
+        """Torna `versao` a atual; a anterior passa a ser antiga"""
+        if self._versao is not None:
+            self._antigas[self._versao] = None
+            while len(self._antigas) > self._max_versoes_antigas:
+                self._antigas.popitem(last=False)
+        self._antigas.pop(versao, None)
+        self._versao = versao
+
+    def _verificar_versao(self, versao: Optional[str]) -> bool:
+        """False quando `versao` já foi substituída (o item não deve ser lido nem guardado)"""
+        if versao is None or versao == self._versao:
+            return True
+        if versao in self._antigas:
+            return False
+        if self._itens:
+            self.invalidacoes += 1
+        self._itens.clear()
+        self._bytes = 0
+        self._aposentar_versao(versao)
+        return True
+
+    def obter(self, chave: Hashable, calcular: Callable[[], Any], versao: Optional[str] = None) -> Any:
+        """Retorna o item da chave, calculando e guardando em caso de falha"""
+        with self._lock:
+            if not self._verificar_versao(versao):
+                self.desatualizados += 1
+                atual = False
+            elif chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave][0]
+            else:
+                self.falhas += 1
+                atual = True
+
+        valor = calcular()
+        if not atual:
+            return valor
+        tamanho = self._tamanho(valor)
+        if tamanho > self.max_bytes:
+            return valor
+
+        with self._lock:
+            if versao is not None and versao != self._versao:
+                return valor  # chegou outra versão enquanto calculava
+            if chave in self._itens:
+                self._bytes -= self._itens.pop(chave)[1]
+            self._itens[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                _, (_, tamanho_removido) = self._itens.popitem(last=False)
+                self._bytes -= tamanho_removido
+                self.despejos += 1
+        return valor
+
+    def migrar_versao(self, versao: str, anterior: str, manter: Callable[[Hashable], bool]):
+        """
+        Passa de `anterior` para `versao` mantendo os itens em que `manter(chave)`
+        é verdadeiro (ainda válidos na versão nova); os demais são descartados.
+        Não faz nada se o cache não está exatamente em `anterior`.
+        """
+        with self._lock:
+            if self._versao != anterior or versao == anterior or versao in self._antigas:
+                return
+            descartadas = [chave for chave in self._itens if not manter(chave)]
+            for chave in descartadas:
+                self._bytes -= self._itens.pop(chave)[1]
+            if descartadas:
+                self.invalidacoes += 1
+            self.preservados += len(self._itens)
+            self._aposentar_versao(versao)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores para acompanhamento operacional"""
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "MB": round(self._bytes / 1024**2, 2),
+                "limite MB": round(self.max_bytes / 1024**2, 2),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa de acerto": round(self.acertos / total, 3) if total else 0.0,
+                "despejos": self.despejos,
+                "invalidações": self.invalidacoes,
+                "pedidos de versões antigas": self.desatualizados,
+                "preservados entre versões": self.preservados,
+            }
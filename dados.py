@@ -0,0 +1,571 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.error import HTTPError
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+DIRETORIO_SNAPSHOTS = Path(".cache") / "snapshots"
+TAMANHO_BLOCO_DOWNLOAD = 1 << 16
+
+# Pico de memória aceito na leitura do CSV; acima disso a leitura é feita em blocos
+ORCAMENTO_MEMORIA_MB = float(os.environ.get("EMENDAS_ORCAMENTO_MB", "256"))
+# Razão aproximada entre o tamanho do CSV e a memória ocupada pelo trecho lido pelo parser
+FATOR_EXPANSAO_CSV = 4
+
+COLUNAS_DESEJADAS = [
+    "STATUS GERAL", "STATUS DA EMENDA", "ANO DA EMENDA", "Nº EMENDA", "Nº REMANEJAMENTO", "SIGEPE / SEI",
+    "DATA OB MS", "MUNICÍPIO", "ENTIDADE", "SUBAÇÃO", "GRUPO DE DESPESA",
+    "MODALIDADE", "VALOR", "PARLAMENTAR", "PARTIDO DO PARLAMENTAR",
+    "PENDÊNCIAS", "SETOR ATUAL ROBÔ", "EXECUÇÃO DA EMENDA"
+]
+
+TIPOS_FINAIS = {"VALOR": "float64", "ANO DA EMENDA": "Int64", "DATA OB MS": "datetime64[ns]"}
+
+# Identificam uma linha entre versões da planilha (com o nº de ocorrência, se repetidas)
+CHAVE_LINHA = ["Nº EMENDA", "Nº REMANEJAMENTO"]
+
+# Colunas cujos valores alterados são reportados a cada atualização incremental
+COLUNAS_PARTICAO = ["ANO DA EMENDA", "MUNICÍPIO", "PARLAMENTAR"]
+
+# Tipos aplicados já na leitura do CSV; VALOR, ANO e DATA são convertidos logo em seguida
+ESQUEMA = {
+    "STATUS GERAL": "category",
+    "STATUS DA EMENDA": "category",
+    "ANO DA EMENDA": "string",
+    "Nº EMENDA": "string",
+    "Nº REMANEJAMENTO": "string",
+    "SIGEPE / SEI": "string",
+    "DATA OB MS": "string",
+    "MUNICÍPIO": "category",
+    "ENTIDADE": "category",
+    "SUBAÇÃO": "category",
+    "GRUPO DE DESPESA": "category",
+    "MODALIDADE": "category",
+    "PARLAMENTAR": "category",
+    "PARTIDO DO PARLAMENTAR": "category",
+    "PENDÊNCIAS": "string",
+    "SETOR ATUAL ROBÔ": "category",
+    "EXECUÇÃO DA EMENDA": "category",
+}
+
+
+def ler_csv(caminho) -> pd.DataFrame:
+    """Lê o CSV exportado e limpa cabeçalhos."""
+    df = pd.read_csv(caminho)
+    df.columns = [c.strip() for c in df.columns]
+    return df
+
+
+def aplicar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte VALOR (float), ANO DA EMENDA (Int64) e DATA OB MS (datetime)."""
+    if "VALOR" in df.columns:
+        df["VALOR"] = pd.to_numeric(df["VALOR"], errors="coerce").astype("float64")
+    if "ANO DA EMENDA" in df.columns:
+        ano = pd.to_numeric(df["ANO DA EMENDA"], errors="coerce")
+        df["ANO DA EMENDA"] = ano.where(ano % 1 == 0).astype("Int64")
+    if "DATA OB MS" in df.columns:
+        df["DATA OB MS"] = pd.to_datetime(df["DATA OB MS"], errors="coerce", dayfirst=True)
+    return df
+
+
+def _bytes_por_linha(caminho, amostra: int = 1 << 20) -> float:
+    with open(caminho, "rb") as f:
+        bloco = f.read(amostra)
+    return len(bloco) / max(bloco.count(b"\n"), 1)
+
+
+def _finalizar_bloco(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [c.strip() for c in df.columns]
+    df = df[[c for c in COLUNAS_DESEJADAS if c in df.columns]]
+    return aplicar_tipos(df)
+
+
+def ler_csv_tipado(caminho, orcamento_mb: Optional[float] = None) -> pd.DataFrame:
+    """
+    Lê apenas COLUNAS_DESEJADAS, já com os tipos finais do painel.
+
+    Arquivos grandes demais para `orcamento_mb` (padrão: ORCAMENTO_MEMORIA_MB) são
+    lidos em blocos; cada bloco é podado e tipado antes do próximo, e só os
+    buffers compactos ficam em memória até a união final.
+    """
+    cabecalho = pd.read_csv(caminho, nrows=0).columns
+    brutas = {}
+    for c in cabecalho:
+        if c.strip() in COLUNAS_DESEJADAS:
+            brutas.setdefault(c.strip(), c)
+
+    dtype = {brutas[c]: t for c, t in ESQUEMA.items() if c in brutas}
+    opcoes = {"usecols": list(brutas.values()), "dtype": dtype}
+
+    orcamento = (orcamento_mb or ORCAMENTO_MEMORIA_MB) * 1024 * 1024
+    if os.path.getsize(caminho) * FATOR_EXPANSAO_CSV <= orcamento:
+        return _finalizar_bloco(pd.read_csv(caminho, **opcoes))
+
+    linhas_por_bloco = max(1000, int(orcamento / (FATOR_EXPANSAO_CSV * _bytes_por_linha(caminho))))
+    blocos = [_finalizar_bloco(b) for b in pd.read_csv(caminho, chunksize=linhas_por_bloco, **opcoes)]
+    return unir_frames(blocos)
+
+
+def tipo_final(coluna: str) -> str:
+    """Tipo da coluna depois de `ler_csv_tipado`"""
+    return TIPOS_FINAIS.get(coluna, ESQUEMA.get(coluna, "object"))
+
+
+def unir_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Une frames de várias fontes no esquema de COLUNAS_DESEJADAS: colunas ausentes
+    em uma fonte entram vazias e as categorias são unificadas antes do concat,
+    para que as colunas categóricas não virem `object`.
+    """
+    if len(frames) == 1:
+        return frames[0]
+
+    colunas = [c for c in COLUNAS_DESEJADAS if any(c in f.columns for f in frames)]
+    alinhados = []
+    for f in frames:
+        faltantes = {c: pd.Series(pd.NA, index=f.index).astype(tipo_final(c)) for c in colunas if c not in f.columns}
+        alinhados.append(f.assign(**faltantes)[colunas] if faltantes else f[colunas])
+
+    for c in colunas:
+        if ESQUEMA.get(c) == "category":
+            categorias = pd.api.types.union_categoricals([f[c] for f in alinhados], sort_categories=True).categories
+            alinhados = [f.assign(**{c: f[c].cat.set_categories(categorias)}) for f in alinhados]
+
+    return pd.concat(alinhados, ignore_index=True)
+
+
+def baixar_csv(
+    url: str,
+    destino: Path,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    timeout: float = 30,
+) -> Tuple[Optional[str], Dict]:
+    """
+    Baixa o CSV para `destino` calculando o hash do conteúdo em streaming.
+    Retorna (hash, cabeçalhos de validação); hash é None quando o servidor
+    responde 304 (conteúdo não mudou desde o ETag/Last-Modified informado).
+    """
+    req = urllib.request.Request(url)
+    if etag:
+        req.add_header("If-None-Match", etag)
+    if last_modified:
+        req.add_header("If-Modified-Since", last_modified)
+
+    try:
+        resp = urllib.request.urlopen(req, timeout=timeout)
+    except HTTPError as e:
+        if e.code == 304:
+            return None, {"etag": etag, "last_modified": last_modified}
+        raise
+
+    digest = hashlib.sha256()
+    with resp, open(destino, "wb") as f:
+        while True:
+            bloco = resp.read(TAMANHO_BLOCO_DOWNLOAD)
+            if not bloco:
+                break
+            digest.update(bloco)
+            f.write(bloco)
+        validadores = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+        }
+    return digest.hexdigest(), validadores
+
+
+class Delta:
+    """Diferença entre duas versões dos dados, por chave de linha + hash do conteúdo"""
+
+    def __init__(
+        self,
+        inseridas: np.ndarray,
+        atualizadas: np.ndarray,
+        removidas: np.ndarray,
+        particoes: Optional[Dict[str, Set]] = None,
+        completa: bool = False,
+    ):
+        self.inseridas = inseridas  # posições na versão nova
+        self.atualizadas = atualizadas  # posições na versão nova
+        self.removidas = removidas  # posições na versão anterior
+        self.particoes = particoes or {}
+        self.completa = completa  # True quando não foi possível comparar linha a linha
+
+    def preserva(self, filtros: Dict[str, Sequence]) -> bool:
+        """
+        Se nenhuma linha alterada (nem na versão anterior, nem na nova) atende a
+        `filtros`: basta um filtro de COLUNAS_PARTICAO sem valores em comum com
+        os das linhas alteradas. Resultados calculados só a partir do conteúdo
+        dessas linhas (agregações) continuam válidos na versão nova.
+        """
+        if self.completa:
+            return False
+        return any(
+            coluna in self.particoes and self.particoes[coluna].isdisjoint(valores)
+            for coluna, valores in filtros.items()
+        )
+
+    @property
+    def vazio(self) -> bool:
+        return not self.completa and not (len(self.inseridas) or len(self.atualizadas) or len(self.removidas))
+
+    def resumo(self) -> str:
+        if self.completa:
+            return "recarga completa"
+        return f"{len(self.inseridas)} inseridas, {len(self.atualizadas)} atualizadas, {len(self.removidas)} removidas"
+
+
+def _chaves_linha(df: pd.DataFrame, colunas: List[str]) -> pd.Series:
+    """Hash da chave de cada linha; chaves repetidas são diferenciadas pela ordem de ocorrência."""
+    chaves = df[colunas].astype("string").fillna("")
+    ocorrencia = chaves.groupby(colunas, sort=False).cumcount()
+    return pd.util.hash_pandas_object(chaves.assign(_ocorrencia=ocorrencia), index=False)
+
+
+def comparar_versoes(atual: pd.DataFrame, novo: pd.DataFrame) -> Delta:
+    """
+    Compara duas versões pela chave CHAVE_LINHA e pelo hash de cada linha.
+    Reporta as linhas inseridas/atualizadas/removidas e, para COLUNAS_PARTICAO,
+    os valores (ano, município, parlamentar) afetados em qualquer das versões,
+    usados por `Delta.preserva` para manter caches que não dependem deles.
+    """
+    colunas_chave = [c for c in CHAVE_LINHA if c in novo.columns]
+    if not colunas_chave or list(atual.columns) != list(novo.columns):
+        return Delta(np.arange(len(novo)), np.array([], dtype=int), np.arange(len(atual)), completa=True)
+
+    chave_atual = _chaves_linha(atual, colunas_chave).to_numpy()
+    chave_nova = _chaves_linha(novo, colunas_chave).to_numpy()
+    hash_atual = pd.util.hash_pandas_object(atual, index=False).to_numpy()
+    hash_novo = pd.util.hash_pandas_object(novo, index=False).to_numpy()
+
+    posicao_atual = pd.Series(np.arange(len(atual)), index=chave_atual)
+    existe = np.isin(chave_nova, chave_atual)
+    inseridas = np.flatnonzero(~existe)
+    removidas = np.flatnonzero(~np.isin(chave_atual, chave_nova))
+
+    comuns = np.flatnonzero(existe)
+    anteriores = posicao_atual.reindex(chave_nova[comuns]).to_numpy()
+    mudou = hash_novo[comuns] != hash_atual[anteriores]
+    atualizadas = comuns[mudou]
+
+    particoes = {}
+    linhas_antigas = atual.iloc[np.concatenate([removidas, anteriores[mudou]])]
+    linhas_novas = novo.iloc[np.concatenate([inseridas, atualizadas])]
+    for col in COLUNAS_PARTICAO:
+        if col in novo.columns:
+            particoes[col] = set(linhas_antigas[col].dropna().tolist()) | set(linhas_novas[col].dropna().tolist())
+
+    return Delta(inseridas, atualizadas, removidas, particoes)
+
+
+class Dataset:
+    """
+    Versão imutável dos dados, compartilhada (sem cópia) por todas as sessões.
+    Quem usa `df` deve derivar novos frames em vez de alterá-lo.
+    """
+
+    def __init__(self, df: pd.DataFrame, versao: str, carregado_em: Optional[float] = None):
+        self.df = df
+        self.versao = versao
+        self.carregado_em = carregado_em if carregado_em is not None else time.time()
+        self.anterior: Optional[str] = None  # versão a partir da qual `delta` foi calculado
+        self.delta: Optional[Delta] = None
+        self.erros_fontes: Dict[str, str] = {}
+
+
+class SnapshotStore:
+    """Snapshot em disco (Parquet) do último DataFrame carregado com sucesso de cada URL"""
+
+    def __init__(self, diretorio: Path = DIRETORIO_SNAPSHOTS):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self._servidos = set()
+        self._memoria = {}  # url -> (hash, DataFrame) do último snapshot lido/gravado
+        self.erros: Dict[str, str] = {}  # url -> erro da última tentativa de download
+
+    def _base(self, url: str) -> Path:
+        return self.diretorio / hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+    def ler_meta(self, url: str) -> Dict:
+        """Retorna os metadados do snapshot (hash, ETag, horários) ou {}"""
+        caminho = self._base(url).with_suffix(".json")
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _gravar_meta(self, url: str, meta: Dict):
+        caminho = self._base(url).with_suffix(".json")
+        tmp = caminho.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, caminho)
+
+    def ler(self, url: str, conteudo_hash: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Lê o snapshot salvo para a URL, reaproveitando a cópia em memória do mesmo hash"""
+        em_memoria = self._memoria.get(url)
+        if em_memoria is not None and conteudo_hash and em_memoria[0] == conteudo_hash:
+            return em_memoria[1]
+
+        caminho = self._base(url).with_suffix(".parquet")
+        if not caminho.exists():
+            return None
+        try:
+            df = pd.read_parquet(caminho)
+        except Exception:
+            return None
+        self._memoria[url] = (conteudo_hash, df)
+        return df
+
+    def salvar(self, url: str, df: pd.DataFrame, meta: Dict):
+        """Grava o DataFrame e os metadados de forma atômica"""
+        caminho = self._base(url).with_suffix(".parquet")
+        tmp = caminho.with_suffix(".parquet.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, caminho)
+        self._gravar_meta(url, meta)
+        self._memoria[url] = (meta.get("hash"), df)
+
+    def carregar(
+        self,
+        url: str,
+        leitor: Callable[[Path], pd.DataFrame] = ler_csv,
+        max_idade: float = 300,
+        timeout: float = 30,
+    ) -> pd.DataFrame:
+        """
+        Retorna o DataFrame da URL usando o snapshot local sempre que possível.
+
+        - Na primeira chamada do processo, serve o snapshot existente sem ir à rede.
+        - Depois disso, revalida quando o snapshot tem mais de `max_idade` segundos;
+          se o hash/ETag não mudou, reaproveita o snapshot sem reprocessar o CSV.
+        - Se o download falhar e houver snapshot, continua servindo o snapshot.
+        """
+        meta = self.ler_meta(url)
+        if meta.get("leitor") != leitor.__name__:
+            meta = {}  # snapshot gerado por outro leitor: reprocessa do zero
+        df = self.ler(url, meta.get("hash")) if meta else None
+
+        if df is not None:
+            primeira_vez = url not in self._servidos
+            self._servidos.add(url)
+            verificado_em = meta.get("verificado_em", 0)
+            if (primeira_vez and verificado_em) or time.time() - verificado_em < max_idade:
+                return df
+
+        fd, nome_tmp = tempfile.mkstemp(dir=self.diretorio, suffix=".csv")
+        os.close(fd)
+        tmp = Path(nome_tmp)
+        try:
+            try:
+                conteudo_hash, validadores = baixar_csv(
+                    url,
+                    tmp,
+                    etag=meta.get("etag") if df is not None else None,
+                    last_modified=meta.get("last_modified") if df is not None else None,
+                    timeout=timeout,
+                )
+            except Exception as e:
+                self.erros[url] = str(e)
+                if df is not None:
+                    return df
+                raise
+            self.erros.pop(url, None)
+
+            agora = time.time()
+            if df is not None and conteudo_hash in (None, meta.get("hash")):
+                meta.update({k: v for k, v in validadores.items() if v})
+                meta["verificado_em"] = agora
+                self._gravar_meta(url, meta)
+                return df
+
+            df = leitor(tmp)
+            self.salvar(url, df, {
+                "url": url,
+                "leitor": leitor.__name__,
+                "hash": conteudo_hash,
+                "etag": validadores.get("etag"),
+                "last_modified": validadores.get("last_modified"),
+                "salvo_em": agora,
+                "verificado_em": agora,
+                "linhas": len(df),
+            })
+            self._servidos.add(url)
+            return df
+        finally:
+            tmp.unlink(missing_ok=True)
+
+
+def carregar_fontes(
+    store: SnapshotStore,
+    fontes: List[Dict],
+    leitor: Callable[[Path], pd.DataFrame] = ler_csv_tipado,
+    max_workers: int = 4,
+    timeout: float = 30,
+) -> Dataset:
+    """
+    Carrega várias fontes ({"nome", "url"}) em paralelo e une os resultados.
+
+    Cada fonte tem seu próprio snapshot: se uma fonte falhar ou passar de
+    `timeout` (contado de quando ela começa a carregar), entra a última versão
+    salva dela e o erro fica em `dataset.erros_fontes`, sem atrasar nem
+    invalidar as outras.
+    """
+    frames, versoes, erros = {}, {}, {}
+    workers = max(1, min(max_workers, len(fontes)))
+    inicios: Dict[str, float] = {}  # url -> momento em que um worker começou a carregá-la
+
+    def carregar(url: str) -> pd.DataFrame:
+        inicios[url] = time.monotonic()
+        return store.carregar(url, leitor, 0, timeout)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fonte")
+    futuros = {executor.submit(carregar, f["url"]): f for f in fontes}
+
+    # O prazo de cada fonte conta de quando ela começa a carregar, não da
+    # submissão; fontes na fila só esgotam se nenhum worker ficar livre a tempo
+    limite_fila = time.monotonic() + timeout * (-(-len(fontes) // workers) + 1)
+    pendentes, expiradas = set(futuros), set()
+    while pendentes:
+        agora = time.monotonic()
+        prazos = [inicios[futuros[f]["url"]] + timeout for f in pendentes if futuros[f]["url"] in inicios]
+        espera = max(0.0, min(prazos + [limite_fila]) - agora)
+        _, pendentes = wait(pendentes, timeout=min(espera, timeout), return_when=FIRST_COMPLETED)
+        agora = time.monotonic()
+        for futuro in list(pendentes):
+            inicio = inicios.get(futuros[futuro]["url"])
+            if (inicio is not None and agora - inicio >= timeout) or (inicio is None and agora >= limite_fila):
+                expiradas.add(futuro)
+                pendentes.discard(futuro)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for futuro, fonte in futuros.items():
+        nome, url = fonte["nome"], fonte["url"]
+        try:
+            if futuro in expiradas:
+                if futuros[futuro]["url"] not in inicios:
+                    raise TimeoutError("não iniciada: todos os workers ocupados")
+                raise TimeoutError(f"tempo esgotado após {timeout:.0f}s")
+            frames[nome] = futuro.result()
+            if url in store.erros:
+                erros[nome] = store.erros[url]  # serviu o snapshot anterior
+        except Exception as e:
+            erros[nome] = str(e)
+            anterior = store.ler(url, store.ler_meta(url).get("hash"))
+            if anterior is None:
+                continue
+            frames[nome] = anterior
+        meta = store.ler_meta(url)
+        versoes[nome] = (meta.get("hash", ""), meta.get("salvo_em") or time.time())
+
+    if not frames:
+        raise RuntimeError("Nenhuma fonte pôde ser carregada: " + "; ".join(f"{n}: {e}" for n, e in erros.items()))
+
+    ordem = [f["nome"] for f in fontes if f["nome"] in frames]
+    versao = hashlib.sha256("|".join(f"{n}:{versoes[n][0]}" for n in ordem).encode("utf-8")).hexdigest()
+    dataset = Dataset(unir_frames([frames[n] for n in ordem]), versao, max(v[1] for v in versoes.values()))
+    dataset.erros_fontes = erros
+    return dataset
+
+
+class AtualizadorDados:
+    """
+    Mantém o Dataset atualizado em uma thread de fundo (stale-while-revalidate).
+
+    As sessões leem `dataset` sem bloquear: enquanto uma atualização está em
+    andamento, continuam recebendo a versão anterior, que é trocada de uma vez
+    quando a nova termina de carregar.
+
+    Com `incremental=True`, a nova versão é comparada linha a linha com a atual
+    (ver `comparar_versoes`); se nenhuma linha mudou, a versão atual é mantida e
+    nada a jusante é invalidado, senão o Delta fica disponível em `dataset.delta`.
+    """
+
+    def __init__(
+        self,
+        carregar: Callable[[], Dataset],
+        intervalo: float = 300,
+        antecedencia: float = 30,
+        incremental: bool = True,
+    ):
+        self._carregar = carregar
+        self.intervalo = intervalo
+        self.antecedencia = antecedencia
+        self.incremental = incremental
+        self._dataset: Optional[Dataset] = None
+        self._lock = threading.Lock()
+        self._pedido = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.atualizando = False
+        self.verificado_em: Optional[float] = None
+        self.ultimo_erro: Optional[Exception] = None
+        self.erros_fontes: Dict[str, str] = {}  # da última carga, mesmo que a versão não tenha mudado
+
+    @property
+    def dataset(self) -> Dataset:
+        """Versão atual; só bloqueia na primeira carga do processo"""
+        if self._dataset is None:
+            with self._lock:
+                if self._dataset is None:
+                    self._dataset = self._carregar()
+                    self._registrar_verificacao(self._dataset)
+        self._iniciar()
+        return self._dataset
+
+    def _registrar_verificacao(self, carga: Dataset):
+        """
+        Guarda os erros das fontes da última carga (que pode ter sido descartada
+        por não mudar a versão); só conta como verificada se todas responderam.
+        """
+        self.erros_fontes = dict(carga.erros_fontes)
+        if not carga.erros_fontes:
+            self.verificado_em = time.time()
+
+    def solicitar_atualizacao(self):
+        """Pede uma atualização imediata sem esperar o fim dela"""
+        self.atualizando = True
+        self._iniciar()
+        self._pedido.set()
+
+    def _iniciar(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._executar, name="atualizador-dados", daemon=True)
+                    self._thread.start()
+
+    def _executar(self):
+        while True:
+            self._pedido.wait(timeout=max(self.intervalo - self.antecedencia, 1))
+            self._pedido.clear()
+            self._atualizar()
+
+    def _atualizar(self):
+        self.atualizando = True
+        try:
+            novo = self._carregar()
+            atual = self._dataset
+            if atual is None:
+                self._dataset = novo
+            elif novo.versao != atual.versao:
+                if self.incremental:
+                    novo.anterior = atual.versao
+                    novo.delta = comparar_versoes(atual.df, novo.df)
+                if novo.delta is None or not novo.delta.vazio:
+                    self._dataset = novo
+            self._registrar_verificacao(novo)
+            self.ultimo_erro = None
+        except Exception as e:
+            self.ultimo_erro = e
+        finally:
+            self.atualizando = False
@@ -0,0 +1,180 @@
+import base64
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+# Pasta servida pelo Streamlit em app/static/ (server.enableStaticServing)
+DIRETORIO_STATIC = Path("static")
+URL_STATIC = "app/static"
+
+_TOKEN_PATH = re.compile(r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_ATRIBUTO_D = re.compile(r'\bd="([^"]*)"')
+
+
+# Quantidade de números de cada comando absoluto que a conversão para relativo entende
+_ARIDADE = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "Z": 0}
+
+
+def _numero(unidades: int, casas: int) -> str:
+    """Número em unidades de 10**-casas, no formato mais curto ("-.5", "12", "3.2")"""
+    sinal = "-" if unidades < 0 else ""
+    inteiro, fracao = divmod(abs(unidades), 10 ** casas)
+    texto = f"{inteiro}.{fracao:0{casas}d}".rstrip("0").rstrip(".") if casas else str(inteiro)
+    if texto.startswith("0."):
+        texto = texto[1:]
+    return sinal + texto if texto != "0" else "0"
+
+
+def _juntar(partes) -> str:
+    """Junta comandos e números só com os separadores obrigatórios"""
+    saida = []
+    anterior = ""
+    for parte in partes:
+        precisa_espaco = anterior and not anterior.isalpha() and not parte.isalpha() and not parte.startswith("-") and not (
+            parte.startswith(".") and "." in anterior
+        )
+        saida.append((" " if precisa_espaco else "") + parte)
+        anterior = parte
+    return "".join(saida)
+
+
+def minificar_path(d: str, casas: int = 1) -> str:
+    """
+    Dados de um <path> com coordenadas arredondadas para `casas` decimais e
+    reescritos em comandos relativos (números menores). Os deslocamentos são
+    calculados entre pontos já arredondados, então o erro não se acumula.
+    Caminhos com comandos fora de _ARIDADE só têm os números arredondados.
+    """
+    tokens = _TOKEN_PATH.findall(d)
+    escala = 10 ** casas
+    q = lambda token: round(float(token) * escala)
+    arredondado = lambda: _juntar(t if t.isalpha() else _numero(q(t), casas) for t in tokens)
+    if any(t.isalpha() and t not in _ARIDADE for t in tokens):
+        return arredondado()
+    try:
+        return _juntar(_relativos(tokens, q, casas))
+    except (ValueError, IndexError):  # número de argumentos inesperado
+        return arredondado()
+
+
+def _relativos(tokens, q, casas: int):
+    partes = []
+    x = y = inicio_x = inicio_y = 0
+    ultimo = ""
+    i = 0
+    comando = ""
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            comando = tokens[i]
+            i += 1
+        elif comando == "M":
+            comando = "L"  # pares depois de um M são linhas implícitas
+        args = [q(t) for t in tokens[i:i + _ARIDADE[comando]]]
+        i += _ARIDADE[comando]
+        if len(args) != _ARIDADE[comando]:
+            raise ValueError(comando)
+
+        if comando == "M":
+            x, y = inicio_x, inicio_y = args
+            emitir = ["M", _numero(x, casas), _numero(y, casas)]
+        elif comando == "Z":
+            x, y = inicio_x, inicio_y
+            emitir = ["z"]
+        elif comando == "H":
+            emitir = ["h", _numero(args[0] - x, casas)]
+            x = args[0]
+        elif comando == "V":
+            emitir = ["v", _numero(args[0] - y, casas)]
+            y = args[0]
+        else:
+            relativos = [v - (x if j % 2 == 0 else y) for j, v in enumerate(args)]
+            emitir = [comando.lower()] + [_numero(v, casas) for v in relativos]
+            x, y = args[-2], args[-1]
+
+        # Comando igual ao anterior pode ser omitido (repetição implícita)
+        if emitir[0] == ultimo and ultimo not in ("M", "z"):
+            emitir = emitir[1:]
+        else:
+            ultimo = emitir[0]
+        partes.extend(emitir)
+    return partes
+
+
+def minificar_svg(svg: str, casas: int = 1) -> str:
+    """
+    SVG menor para exibição: caminhos com `casas` decimais (o logo é exibido
+    bem menor que o viewBox) e sem comentários ou espaços entre as tags.
+    """
+    svg = re.sub(r"<!--.*?-->", "", svg, flags=re.S)
+    svg = _ATRIBUTO_D.sub(lambda m: f'd="{minificar_path(m.group(1), casas)}"', svg)
+    return re.sub(r">\s+<", "><", svg).strip()
+
+
+class LogoEstatico(NamedTuple):
+    """Logo otimizado, gravado com nome por conteúdo para ser servido por referência"""
+
+    tamanho_original: int
+    conteudo: bytes
+    mime: str
+    arquivo: Path
+
+    @property
+    def url(self) -> str:
+        return f"{URL_STATIC}/{self.arquivo.name}"
+
+    def src(self, servido: bool) -> str:
+        """URL estática (cacheável pelo navegador) ou, sem static serving, data URI do arquivo otimizado"""
+        if servido:
+            return self.url
+        return f"data:{self.mime};base64,{base64.b64encode(self.conteudo).decode()}"
+
+    def img(self, servido: bool, largura: Optional[int] = None, alt: str = "Logo") -> str:
+        largura_html = f' width="{largura}"' if largura else ""
+        return f'<img src="{self.src(servido)}" alt="{alt}"{largura_html} />'
+
+
+def static_servido() -> bool:
+    """Se o Streamlit está servindo DIRETORIO_STATIC (server.enableStaticServing)"""
+    import streamlit as st
+
+    return bool(st.get_option("server.enableStaticServing"))
+
+
+@lru_cache(maxsize=None)
+def ler_texto(caminho: str) -> Optional[str]:
+    """Conteúdo de um arquivo de texto (CSS), lido uma vez por processo; None se não existir"""
+    try:
+        return Path(caminho).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def logo_otimizado(caminho: str, diretorio: Path = DIRETORIO_STATIC) -> Optional[LogoEstatico]:
+    """
+    Versão otimizada do logo (SVG minificado; outros formatos, copiados),
+    gerada uma vez por processo em `diretorio` como logo.<hash>.<ext>.
+    """
+    origem = Path(caminho)
+    if not origem.exists():
+        return None
+    original = origem.read_bytes()
+    if origem.suffix.lower() == ".svg":
+        conteudo = minificar_svg(original.decode("utf-8")).encode("utf-8")
+        mime = "image/svg+xml"
+    else:
+        conteudo = original
+        mime = f"image/{origem.suffix.lower().lstrip('.').replace('jpg', 'jpeg')}"
+
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    arquivo = diretorio / f"{origem.stem}.{hashlib.sha1(conteudo).hexdigest()[:12]}{origem.suffix.lower()}"
+    if not arquivo.exists():
+        for antigo in diretorio.glob(f"{origem.stem}.*{origem.suffix.lower()}"):
+            antigo.unlink(missing_ok=True)
+        temporario = arquivo.with_suffix(".tmp")
+        temporario.write_bytes(conteudo)
+        temporario.replace(arquivo)
+    return LogoEstatico(len(original), conteudo, mime, arquivo)
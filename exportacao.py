@@ -0,0 +1,111 @@
+import hashlib
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Hashable, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DIRETORIO_EXPORTACOES = Path(".cache") / "exportacoes"
+LINHAS_POR_BLOCO = 50_000
+MAX_LINHAS_XLSX = 1_048_575  # limite de linhas de uma planilha, menos o cabeçalho
+
+
+def escrever_csv(df: pd.DataFrame, destino: BinaryIO):
+    """CSV UTF-8 escrito em blocos de linhas, sem montar o texto inteiro em memória"""
+    texto = io.TextIOWrapper(destino, encoding="utf-8", newline="", write_through=True)
+    for inicio in range(0, max(len(df), 1), LINHAS_POR_BLOCO):
+        df.iloc[inicio:inicio + LINHAS_POR_BLOCO].to_csv(texto, header=inicio == 0, index=False)
+    texto.detach()
+
+
+def escrever_parquet(df: pd.DataFrame, destino: BinaryIO):
+    """Parquet com um row group por bloco de linhas"""
+    escritor = None
+    for inicio in range(0, max(len(df), 1), LINHAS_POR_BLOCO):
+        tabela = pa.Table.from_pandas(df.iloc[inicio:inicio + LINHAS_POR_BLOCO], preserve_index=False)
+        if escritor is None:
+            escritor = pq.ParquetWriter(destino, tabela.schema)
+        escritor.write_table(tabela)
+    escritor.close()
+
+
+def escrever_xlsx(df: pd.DataFrame, destino: BinaryIO):
+    """Planilha Excel (exige o pacote opcional openpyxl)"""
+    if len(df) > MAX_LINHAS_XLSX:
+        raise ValueError(f"O Excel comporta até {MAX_LINHAS_XLSX:,} linhas; use CSV ou Parquet.")
+    with pd.ExcelWriter(destino, engine="openpyxl") as planilha:
+        df.to_excel(planilha, index=False, sheet_name="Emendas")
+
+
+class Formato(NamedTuple):
+    extensao: str
+    mime: str
+    escrever: Callable[[pd.DataFrame, BinaryIO], None]
+
+
+FORMATOS: Dict[str, Formato] = {
+    "CSV": Formato("csv", "text/csv", escrever_csv),
+    "Parquet": Formato("parquet", "application/vnd.apache.parquet", escrever_parquet),
+}
+if importlib.util.find_spec("openpyxl") is not None:
+    FORMATOS["Excel"] = Formato(
+        "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", escrever_xlsx
+    )
+
+
+def exportar(
+    df: pd.DataFrame,
+    formato: str,
+    versao: str,
+    estado: Hashable,
+    diretorio: Path = DIRETORIO_EXPORTACOES,
+    versao_atual: Optional[str] = None,
+) -> Path:
+    """
+    Arquivo de exportação de `df` no formato pedido, gerado só na primeira vez
+    para cada (versão dos dados, estado dos filtros, formato) e guardado em
+    disco. Só exportações da versão atual (`versao_atual`) apagam as de outras
+    versões: um fragment ainda com a versão anterior não apaga as da atual.
+    """
+    especificacao = FORMATOS[formato]
+    pasta = Path(diretorio) / (versao[:16] or "dados")
+    nome = hashlib.sha1(repr((estado, formato)).encode("utf-8")).hexdigest()[:20]
+    caminho = pasta / f"{nome}.{especificacao.extensao}"
+    if caminho.exists():
+        return caminho
+
+    pasta.mkdir(parents=True, exist_ok=True)
+    if versao_atual is not None and versao == versao_atual:
+        for antiga in Path(diretorio).iterdir():
+            if antiga != pasta and antiga.is_dir():
+                shutil.rmtree(antiga, ignore_errors=True)
+
+    # Escreve em arquivo temporário e renomeia: downloads simultâneos nunca leem um arquivo pela metade
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            especificacao.escrever(df, destino)
+        os.replace(temporario, caminho)
+    except BaseException:
+        Path(temporario).unlink(missing_ok=True)
+        raise
+    return caminho
+
+
+def conteudo_exportacao(df: pd.DataFrame, formato: str, versao: str, estado: Hashable, **opcoes) -> bytes:
+    """
+    Bytes da exportação (ver `exportar`), para o download_button. O arquivo
+    inteiro é lido em memória: o Streamlit guarda o conteúdo do download até
+    o navegador buscá-lo. Se outra sessão apagar o arquivo entre a geração e a
+    leitura (versão substituída), ele é gerado de novo.
+    """
+    try:
+        return exportar(df, formato, versao, estado, **opcoes).read_bytes()
+    except FileNotFoundError:
+        return exportar(df, formato, versao, estado, **opcoes).read_bytes()
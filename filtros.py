@@ -0,0 +1,179 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class IndiceColuna:
+    """Índice invertido de uma coluna: código de cada linha + posições de cada valor"""
+
+    def __init__(self, serie: pd.Series):
+        codigos, valores = pd.factorize(serie, sort=True)
+        self.codigos = codigos  # -1 para valores ausentes
+        self.valores: List[Hashable] = list(valores)
+        self._codigo_por_valor = {v: i for i, v in enumerate(self.valores)}
+
+        # Listas de posições no formato CSR: as linhas do valor i ficam em
+        # ordem[inicio[i]:inicio[i + 1]], já em ordem crescente
+        self._ordem = np.argsort(codigos, kind="stable")
+        contagem = np.bincount(codigos[codigos >= 0], minlength=len(self.valores))
+        ausentes = int((codigos < 0).sum())
+        self._inicio = np.concatenate([[0], np.cumsum(contagem)]) + ausentes
+
+    def codigo(self, valor) -> int:
+        return self._codigo_por_valor.get(valor, -1)
+
+    def codigos_de(self, valores: Sequence) -> np.ndarray:
+        return np.array([c for c in (self.codigo(v) for v in valores) if c >= 0], dtype=self.codigos.dtype)
+
+    def posicoes(self, valor) -> np.ndarray:
+        """Linhas (em ordem crescente) em que a coluna é igual a `valor`"""
+        i = self.codigo(valor)
+        if i < 0:
+            return np.array([], dtype=np.intp)
+        return self._ordem[self._inicio[i]:self._inicio[i + 1]]
+
+    def tamanho(self, valor) -> int:
+        i = self.codigo(valor)
+        return 0 if i < 0 else int(self._inicio[i + 1] - self._inicio[i])
+
+    def posicoes_de(self, valores: Sequence) -> np.ndarray:
+        """Linhas (em ordem crescente) em que a coluna está em `valores`"""
+        if len(valores) == 1:
+            return self.posicoes(valores[0])
+        return np.sort(np.concatenate([self.posicoes(v) for v in valores] or [np.array([], dtype=np.intp)]))
+
+
+def chave_filtros(
+    filtros: Dict[str, Sequence],
+    intervalos: Optional[Dict[str, Tuple]] = None,
+    busca: str = "",
+) -> Tuple:
+    """Forma canônica (hashable, independente da ordem) de um estado de filtros"""
+    return (
+        tuple(sorted((c, tuple(sorted(v, key=str))) for c, v in filtros.items())),
+        tuple(sorted((intervalos or {}).items())),
+        busca,
+    )
+
+
+class MotorFiltros:
+    """
+    Avalia os filtros da barra lateral sobre índices construídos uma vez por
+    versão dos dados: índices invertidos para as colunas de seleção (um ou
+    vários valores) e vetores numéricos para as colunas de intervalo.
+
+    Em vez de gerar um frame por filtro, cada filtro reduz um único vetor de
+    posições (partindo da seleção mais restritiva) e o frame final é
+    materializado uma vez só, com `frame`.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        colunas: List[str],
+        colunas_intervalo: Sequence[str] = (),
+        max_opcoes_memo: int = 512,
+    ):
+        self.df = df
+        self.indices = {c: IndiceColuna(df[c]) for c in colunas if c in df.columns}
+        self.intervalos = {}
+        for c in colunas_intervalo:
+            if c not in df.columns:
+                continue
+            if pd.api.types.is_datetime64_any_dtype(df[c]):
+                self.intervalos[c] = df[c].to_numpy(dtype="datetime64[ns]")
+            else:
+                self.intervalos[c] = df[c].to_numpy(dtype="float64", na_value=np.nan)
+        self._opcoes_memo = OrderedDict()
+        self._max_opcoes_memo = max_opcoes_memo
+        self._lock = threading.Lock()
+
+    def limites(self, coluna: str) -> Optional[Tuple]:
+        """Menor e maior valor não nulo de uma coluna de intervalo"""
+        valores = self.intervalos[coluna]
+        validos = valores[~np.isnan(valores)] if valores.dtype.kind == "f" else valores[~np.isnat(valores)]
+        if not len(validos):
+            return None
+        return validos.min(), validos.max()
+
+    def refinar(self, posicoes: Optional[np.ndarray], coluna: str, valores: Sequence) -> np.ndarray:
+        """Aplica `coluna in valores` sobre as posições atuais (None = todas as linhas)"""
+        indice = self.indices[coluna]
+        if posicoes is None:
+            return indice.posicoes_de(valores)
+        codigos = indice.codigos[posicoes]
+        if len(valores) == 1:
+            return posicoes[codigos == indice.codigo(valores[0])]
+        return posicoes[np.isin(codigos, indice.codigos_de(valores))]
+
+    def restringir(self, posicoes: Optional[np.ndarray], coluna: str, minimo, maximo) -> np.ndarray:
+        """Aplica `minimo <= coluna <= maximo` (limites inclusivos; nulos saem)"""
+        valores = self.intervalos[coluna]
+        if valores.dtype.kind == "M":
+            minimo, maximo = np.datetime64(pd.Timestamp(minimo), "ns"), np.datetime64(pd.Timestamp(maximo), "ns")
+        if posicoes is None:
+            return np.flatnonzero((valores >= minimo) & (valores <= maximo))
+        v = valores[posicoes]
+        return posicoes[(v >= minimo) & (v <= maximo)]
+
+    def filtrar(
+        self,
+        filtros: Dict[str, Sequence],
+        intervalos: Optional[Dict[str, Tuple]] = None,
+        base: Optional[np.ndarray] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        Posições das linhas que atendem a todos os filtros, partindo das linhas de
+        `base` (ex.: resultado da busca); None quando não há filtros nem base
+        """
+        posicoes = base
+        ordem = sorted(filtros.items(), key=lambda cv: sum(self.indices[cv[0]].tamanho(v) for v in cv[1]))
+        for coluna, valores in ordem:
+            posicoes = self.refinar(posicoes, coluna, valores)
+        for coluna, (minimo, maximo) in (intervalos or {}).items():
+            posicoes = self.restringir(posicoes, coluna, minimo, maximo)
+        return posicoes
+
+    def opcoes(
+        self,
+        coluna: str,
+        filtros: Dict[str, Sequence],
+        intervalos: Optional[Dict[str, Tuple]] = None,
+        posicoes: Optional[np.ndarray] = None,
+        base: Optional[np.ndarray] = None,
+        busca: str = "",
+    ) -> List[Hashable]:
+        """
+        Valores distintos (ordenados) de `coluna` nas linhas que atendem aos filtros
+        (e à busca `busca`, cujas linhas vêm em `base`).
+        Vêm do dicionário ordenado do índice e ficam memorizados por estado dos
+        filtros, então reruns causados por outros widgets não varrem linhas.
+        """
+        chave = (coluna, chave_filtros(filtros, intervalos, busca))
+        with self._lock:
+            if chave in self._opcoes_memo:
+                self._opcoes_memo.move_to_end(chave)
+                return self._opcoes_memo[chave]
+
+        indice = self.indices[coluna]
+        if not filtros and not intervalos and base is None:
+            resultado = indice.valores
+        else:
+            if posicoes is None:
+                posicoes = self.filtrar(filtros, intervalos, base)
+            codigos = indice.codigos[posicoes]
+            presentes = np.bincount(codigos[codigos >= 0], minlength=len(indice.valores))
+            resultado = [indice.valores[i] for i in np.flatnonzero(presentes)]
+
+        with self._lock:
+            self._opcoes_memo[chave] = resultado
+            if len(self._opcoes_memo) > self._max_opcoes_memo:
+                self._opcoes_memo.popitem(last=False)
+        return resultado
+
+    def frame(self, posicoes: Optional[np.ndarray]) -> pd.DataFrame:
+        """Materializa as linhas selecionadas (sem cópia quando não há filtro)"""
+        return self.df if posicoes is None else self.df.take(posicoes)
@@ -1,26 +1,81 @@
 import streamlit as st
-from auth import require_authentication, AuthManager, init_session_state
-import unicodedata
+from auth import require_authentication, AuthManager, init_session_state, revogar_sessao
+from dados import AtualizadorDados, Dataset, SnapshotStore, carregar_fontes
+from filtros import MotorFiltros, chave_filtros
+from texto import TextoNormalizado
+from busca import IndiceBusca
+from banco_sql import BancoSQL, ConsultaSQL
+from cache import CacheLRU, impressao_frame
+from exportacao import FORMATOS, conteudo_exportacao
+from estaticos import ler_texto, logo_otimizado, static_servido
+from agregacoes import (
+    ConsultaCubo, ContextoAgregacao, CuboAgregado, contar_execucoes, dados_ano_status, dados_por_dimensao,
+    dados_por_parlamentar, serie_mensal
+)
+import json
+import os
+import time
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 
 st.set_page_config(page_title="BI - Emendas", page_icon="📊", layout="wide")
+inicio_rerun = time.perf_counter()
+
+# O Dataset é compartilhado entre sessões: com copy-on-write, filtros e
+# agregações nunca alteram o frame original (padrão a partir do pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 init_session_state()
-auth_manager = AuthManager(credentials_file="credentials.json")
+
+@st.cache_resource
+def obter_auth_manager() -> AuthManager:
+    """Credenciais carregadas uma vez por processo (recarregadas quando os arquivos mudam)."""
+    return AuthManager(credentials_file="credentials.json")
+
+auth_manager = obter_auth_manager()
 
 if not require_authentication(auth_manager, logo_path="logo.svg"):
     st.stop()
 
+SHEET_ID = "1EiFehMxLM5DdIBu5ZCdMv4wQpZCf5fYMVdkUzrnqT5w"
+GID = "1186502103"
+
+def url_planilha(sheet_id: str, gid: str) -> str:
+    return f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+
+CSV_URL = os.environ.get("EMENDAS_CSV_URL", url_planilha(SHEET_ID, GID))
+
+# Abas/planilhas unidas no painel, carregadas em paralelo. Outras abas (uma por ano
+# de emenda, remanejamentos...) entram aqui ou via EMENDAS_FONTES, em JSON:
+# [{"nome": "Remanejamentos", "url": "https://..."}]
+FONTES = json.loads(os.environ.get("EMENDAS_FONTES", "null")) or [
+    {"nome": "Emendas", "url": CSV_URL},
+]
+
+
+@st.cache_resource
+def obter_snapshot_store() -> SnapshotStore:
+    """Snapshot local da planilha, compartilhado pelo processo."""
+    return SnapshotStore()
+
+def carregar_dados(fontes: list) -> Dataset:
+    """Carrega as fontes do Google Sheets (via snapshot local) já limpas, tipadas e unidas."""
+    return carregar_fontes(obter_snapshot_store(), fontes, max_workers=4, timeout=30)
+
+@st.cache_resource
+def obter_atualizador() -> AtualizadorDados:
+    """Atualizador em segundo plano; o mesmo Dataset é referenciado por todas as sessões, sem cópia."""
+    return AtualizadorDados(lambda: carregar_dados(FONTES), intervalo=300, antecedencia=30)
+
 def atualizar_cache_e_rerun():
-    """Limpa o cache de carregar_planilha_xlsx e recarrega a página."""
-    try:
-        carregar_dados.clear()  # limpa só o cache dessa função
-    except Exception:
-        # fallback: limpa todos os caches de dados, se necessário
-        st.cache_data.clear()
+    """Dispara a atualização da planilha em segundo plano e recarrega a página.
+    Enquanto a nova versão não chega, o painel continua com a versão atual."""
+    obter_atualizador().solicitar_atualizacao()
     # opcional: marca um timestamp para exibir no UI se quiser
     st.session_state["reset_key"] = datetime.now().timestamp()
     st.rerun()
@@ -74,6 +129,7 @@ with st.container():
         with bcol2:
             st.markdown('<div class="top-actions">', unsafe_allow_html=True)
             if st.button("Logout", key="logout_btn"):
+                revogar_sessao()
                 for key in list(st.session_state.keys()):
                     st.session_state.pop(key, None)
                 st.session_state["authenticated"] = False
@@ -83,16 +139,11 @@ with st.container():
 st.divider()
 
 
-try:
-    with open("main_style.css", "r", encoding="utf-8") as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-except FileNotFoundError:
-    pass
-
-SHEET_ID = "1EiFehMxLM5DdIBu5ZCdMv4wQpZCf5fYMVdkUzrnqT5w"
-GID = "1186502103"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv&gid={GID}"
-
+# CSS e logo são lidos/otimizados uma vez por processo; o logo vai por
+# referência (app/static/), não embutido na página
+css_principal = ler_texto("main_style.css")
+if css_principal is not None:
+    st.markdown(f"<style>{css_principal}</style>", unsafe_allow_html=True)
 
 CONFIG_MODEBAR = {
     "displaylogo": False,
@@ -105,37 +156,31 @@ CONFIG_MODEBAR = {
     "modeBarButtonsToAdd": ["toImage"]
 }
 
-def normalizar_txt(s: str) -> str:
-    """Remove acentos e padroniza minúsculas para mapeamentos de texto."""
-    s = str(s).strip().lower()
-    return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("utf-8")
+@st.cache_resource
+def obter_cache_figuras() -> CacheLRU:
+    """Figuras plotly prontas, compartilhadas entre sessões (tamanho medido pelo JSON)."""
+    return CacheLRU(
+        max_bytes=int(os.environ.get("EMENDAS_CACHE_FIGURAS_MB", "64")) * 1024**2,
+        tamanho=lambda item: item[1],
+    )
 
-@st.cache_data(ttl=300)
-def carregar_dados(url: str) -> pd.DataFrame:
-    """Carrega CSV do Google Sheets e limpa cabeçalhos."""
-    df = pd.read_csv(url)
-    df.columns = [c.strip() for c in df.columns]
-    return df
+# Tamanho (bytes de JSON) de cada figura enviada neste rerun, para o Diagnóstico
+figuras_enviadas = []
 
-def agrega_por_dimensao(df_base: pd.DataFrame, dim: str, how: str) -> pd.DataFrame:
+def figura_em_cache(df_agregado: pd.DataFrame, spec: tuple, construir) -> go.Figure:
     """
-    Agrega valores por dimensão.
-    how: "Contagem" ou "Soma de VALOR"
+    Figura de `construir()` reaproveitada enquanto o frame agregado (pelo
+    conteúdo) e a especificação do gráfico (tipo, título, opções) não mudam.
     """
-    if df_base.empty:
-        return pd.DataFrame(columns=[dim, "Métrica"])
-    if how == "Soma de VALOR" and "VALOR" in df_base.columns:
-        out = df_base.groupby(dim, dropna=False, as_index=False)["VALOR"].sum().rename(columns={"VALOR": "Métrica"})
-    else:
-        out = df_base.groupby(dim, dropna=False, as_index=False).size().rename(columns={"size": "Métrica"})
-    out[dim] = out[dim].fillna("(Sem valor)")
-    return out.sort_values("Métrica", ascending=False)
+    def construir_com_tamanho():
+        fig = construir()
+        return fig, len(pio.to_json(fig, validate=False))
 
-def grafico_generico(df_agregado: pd.DataFrame, dim: str, tipo: str, titulo: str, key: str):
-    if df_agregado.empty:
-        st.info("Sem dados para exibir neste gráfico.")
-        return
+    fig, tamanho = obter_cache_figuras().obter(("figura", impressao_frame(df_agregado)) + spec, construir_com_tamanho)
+    figuras_enviadas.append(tamanho)
+    return fig
 
+def figura_generica(df_agregado: pd.DataFrame, dim: str, tipo: str, titulo: str) -> go.Figure:
     if "Métrica" in df_agregado.columns:
         df_agregado = df_agregado.rename(columns={"Métrica": "QUANTIDADE"})
 
@@ -156,155 +201,122 @@ def grafico_generico(df_agregado: pd.DataFrame, dim: str, tipo: str, titulo: str
         fig = px.bar(base, x=dim, y="%", text_auto=True, title=titulo)
     else:
         fig = px.bar(df_agregado, x=dim, y="QUANTIDADE", text_auto=True, title=titulo)
+    return fig
+
+def grafico_generico(df_agregado: pd.DataFrame, dim: str, tipo: str, titulo: str, key: str):
+    if df_agregado.empty:
+        st.info("Sem dados para exibir neste gráfico.")
+        return
 
+    fig = figura_em_cache(
+        df_agregado, ("generico", dim, tipo, titulo), lambda: figura_generica(df_agregado, dim, tipo, titulo)
+    )
     st.plotly_chart(fig, use_container_width=True, key=key, config=CONFIG_MODEBAR)
 
-def render_por_parlamentar(df_filtrado: pd.DataFrame, top_n_parl: int, tipo_grafico_parl: str, key_prefix: str):
-    if {"PARLAMENTAR", "MUNICÍPIO"}.issubset(df_filtrado.columns):
-        base_tree = df_filtrado.copy()
-        base_tree["VAL_PLOT"] = base_tree["VALOR"].fillna(0) if "VALOR" in base_tree.columns else 1
-
-        metrica_parl = "Soma de VALOR" if ("VALOR" in df_filtrado.columns) else "Contagem"
-        base_parl = agrega_por_dimensao(df_filtrado, "PARLAMENTAR", metrica_parl).head(top_n_parl)
-        base_parl = base_parl.rename(columns={"Métrica": "QUANTIDADE"})
-
-        fig = px.bar(
-            base_parl,
-            x="PARLAMENTAR",
-            y="QUANTIDADE",
-            text_auto=True,
-            title=f"QUANTIDADE DE ANÁLISES POR PARLAMENTAR (TOP {len(base_parl)})"
-        )
-        st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_agg", config=CONFIG_MODEBAR)
+# Cada gráfico tem uma metade de cálculo (em agregacoes.py, resolvida pelo
+# ContextoAgregacao do rerun) e uma metade de desenho (desenhar_*), que só
+# monta a figura a partir do frame já agregado, reaproveitando a do cache
+
+def desenhar_por_parlamentar(base_parl: pd.DataFrame, key_prefix: str):
+    titulo = f"QUANTIDADE DE ANÁLISES POR PARLAMENTAR (TOP {len(base_parl)})"
+    fig = figura_em_cache(base_parl, ("parlamentar", titulo), lambda: px.bar(
+        base_parl,
+        x="PARLAMENTAR",
+        y="QUANTIDADE",
+        text_auto=True,
+        title=titulo
+    ))
+    st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_agg", config=CONFIG_MODEBAR)
+
+def render_por_parlamentar(contexto: ContextoAgregacao, top_n_parl: int, tipo_grafico_parl: str, key_prefix: str):
+    if {"PARLAMENTAR", "MUNICÍPIO"}.issubset(contexto.df.columns):
+        desenhar_por_parlamentar(contexto.obter(dados_por_parlamentar, top_n_parl), key_prefix)
+
+def figura_temporal(serie_val: pd.DataFrame, y_label: str, tipo_grafico_temp: str) -> go.Figure:
+    if tipo_grafico_temp == "Linha":
+        return px.line(serie_val, x="Ano-Mês", y="Métrica", markers=True, title=f"{y_label} por mês")
+    if tipo_grafico_temp == "Área":
+        return px.area(serie_val, x="Ano-Mês", y="Métrica", title=f"{y_label} por mês")
+    return px.bar(serie_val, x="Ano-Mês", y="Métrica", text_auto=True, title=f"{y_label} por mês")
+
+def desenhar_temporal(serie_val: pd.DataFrame, y_label: str, tipo_grafico_temp: str, key_prefix: str):
+    fig_time = figura_em_cache(
+        serie_val, ("temporal", y_label, tipo_grafico_temp),
+        lambda: figura_temporal(serie_val, y_label, tipo_grafico_temp)
+    )
+    st.plotly_chart(fig_time, use_container_width=True, key=f"{key_prefix}_time", config=CONFIG_MODEBAR)
 
-def render_temporal(df_filtrado: pd.DataFrame, tipo_grafico_temp: str, key_prefix: str):
+def render_temporal(contexto: ContextoAgregacao, tipo_grafico_temp: str, key_prefix: str):
+    df_filtrado = contexto.df
     if "DATA OB MS" in df_filtrado.columns and df_filtrado["DATA OB MS"].notna().any():
-        base_tempo = df_filtrado.dropna(subset=["DATA OB MS"]).copy()
-        base_tempo["Ano-Mês"] = base_tempo["DATA OB MS"].dt.to_period("M").dt.to_timestamp()
-
-        if "VALOR" in base_tempo.columns:
-            serie_val = (base_tempo.groupby("Ano-Mês", as_index=False)["VALOR"].sum()
-                         .rename(columns={"VALOR": "Métrica"}))
-            y_label = "Soma de VALOR"
-        else:
-            serie_val = (base_tempo.groupby("Ano-Mês", as_index=False).size()
-                         .rename(columns={"size": "Métrica"}))
-            y_label = "Contagem"
-
-        if tipo_grafico_temp == "Linha":
-            fig_time = px.line(serie_val, x="Ano-Mês", y="Métrica", markers=True, title=f"{y_label} por mês")
-        elif tipo_grafico_temp == "Área":
-            fig_time = px.area(serie_val, x="Ano-Mês", y="Métrica", title=f"{y_label} por mês")
-        else:
-            fig_time = px.bar(serie_val, x="Ano-Mês", y="Métrica", text_auto=True, title=f"{y_label} por mês")
-
-        st.plotly_chart(fig_time, use_container_width=True, key=f"{key_prefix}_time", config=CONFIG_MODEBAR)
+        y_label = "Soma de VALOR" if "VALOR" in df_filtrado.columns else "Contagem"
+        desenhar_temporal(contexto.obter(serie_mensal), y_label, tipo_grafico_temp, key_prefix)
     else:
         st.info("Coluna 'DATA OB MS' ausente ou sem dados válidos.")
 
-def render_barraAgrupada(df_filtrado: pd.DataFrame, agregacao_hm: str, top_n_ano: int, key_prefix: str):
-    if {"ANO DA EMENDA", "STATUS GERAL"}.issubset(df_filtrado.columns):
-        base = df_filtrado.copy()
-        base["ANO DA EMENDA"] = pd.to_numeric(base["ANO DA EMENDA"], errors="coerce")
-        base = base.dropna(subset=["ANO DA EMENDA"])
-
-        if agregacao_hm == "Soma de VALOR" and "VALOR" in base.columns:
-            df_agg = (
-                base.groupby(["ANO DA EMENDA", "STATUS GERAL"], as_index=False)["VALOR"]
-                .sum()
-                .rename(columns={"VALOR": "Métrica"})
-            )
-        else:
-            df_agg = (
-                base.groupby(["ANO DA EMENDA", "STATUS GERAL"], as_index=False)
-                .size()
-                .rename(columns={"size": "Métrica"})
-            )
+def figura_barraAgrupada(df_agg: pd.DataFrame) -> go.Figure:
+    fig = px.bar(
+        df_agg,
+        x="ANO DA EMENDA",
+        y="Métrica",
+        color="STATUS GERAL",
+        barmode="group",
+        text_auto=True,
+        title=f"QUANTIDADE POR ANO E STATUS GERAL DA EMENDA (ÚLTIMOS {df_agg['ANO DA EMENDA'].nunique()} ANOS)"
+    )
+    fig.update_layout(
+        xaxis_title="ANO",
+        yaxis_title="QUANTIDADE",
+        legend_title="Status Geral",
+        bargap=0.15,
+        bargroupgap=0.1,
+    )
+    return fig
 
-        anos_disponiveis = sorted(df_agg["ANO DA EMENDA"].unique())
-        anos_top = anos_disponiveis[-top_n_ano:] if len(anos_disponiveis) > top_n_ano else anos_disponiveis
-        df_agg = df_agg[df_agg["ANO DA EMENDA"].isin(anos_top)]
-        df_agg = df_agg.sort_values("ANO DA EMENDA")
-
-        if not df_agg.empty:
-            fig = px.bar(
-                df_agg,
-                x="ANO DA EMENDA",
-                y="Métrica",
-                color="STATUS GERAL",
-                barmode="group",
-                text_auto=True,
-                title=f"QUANTIDADE POR ANO E STATUS GERAL DA EMENDA (ÚLTIMOS {len(anos_top)} ANOS)"
-            )
-            fig.update_layout(
-                xaxis_title="ANO",
-                yaxis_title="QUANTIDADE",
-                legend_title="Status Geral",
-                bargap=0.15,
-                bargroupgap=0.1,
-            )
-            st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_barras", config=CONFIG_MODEBAR)
-        else:
-            st.info("Sem dados suficientes para gerar o gráfico.")
+def desenhar_barraAgrupada(df_agg: pd.DataFrame, key_prefix: str):
+    if df_agg.empty:
+        st.info("Sem dados suficientes para gerar o gráfico.")
+        return
+
+    fig = figura_em_cache(df_agg, ("ano_status",), lambda: figura_barraAgrupada(df_agg))
+    st.plotly_chart(fig, use_container_width=True, key=f"{key_prefix}_barras", config=CONFIG_MODEBAR)
+
+def render_barraAgrupada(contexto: ContextoAgregacao, agregacao_hm: str, top_n_ano: int, key_prefix: str):
+    if {"ANO DA EMENDA", "STATUS GERAL"}.issubset(contexto.df.columns):
+        desenhar_barraAgrupada(contexto.obter(dados_ano_status, agregacao_hm, top_n_ano), key_prefix)
     else:
         st.info("São necessárias as colunas 'ANO DA EMENDA' e 'STATUS GERAL'.")
 
-def render_execucao(df_filtrado: pd.DataFrame, key_prefix: str):
-    if "EXECUÇÃO DA EMENDA" in df_filtrado.columns:
-        exec_norm = df_filtrado["EXECUÇÃO DA EMENDA"].dropna().map(normalizar_txt)
-        mapa_exec = {
-            "executada": "Executada",
-            "em execucao": "Em Execução",
-            "em execução": "Em Execução",
-            "nao executada": "Não Executada",
-            "não executada": "Não Executada"
-        }
-
-        exec_padrao = exec_norm.map(mapa_exec).fillna("Outros/Indef.")
-        categorias = ["Em Execução", "Executada", "Não Executada", "Outros/Indef."]
-
-        execucoes = (
-            exec_padrao.value_counts()
-            .reindex(categorias, fill_value=0)
-            .reset_index()
-            .rename(columns={"index": "SITUAÇÃO", 0: "QUANTIDADE"})
-        )
-        execucoes.columns = ["SITUAÇÃO", "QUANTIDADE"]
-
-        fig_exec = px.pie(
-            execucoes,
-            names="SITUAÇÃO",
-            values="QUANTIDADE",
-            title="SITUAÇÃO DAS EMENDAS",
-            hole=0.0,
-        )
-        fig_exec.update_traces(textinfo="label+value", textfont_size=14)
-        st.plotly_chart(fig_exec, use_container_width=True, key=f"{key_prefix}_exec", config=CONFIG_MODEBAR)
+def figura_execucao(execucoes: pd.DataFrame) -> go.Figure:
+    fig_exec = px.pie(
+        execucoes,
+        names="SITUAÇÃO",
+        values="QUANTIDADE",
+        title="SITUAÇÃO DAS EMENDAS",
+        hole=0.0,
+    )
+    fig_exec.update_traces(textinfo="label+value", textfont_size=14)
+    return fig_exec
+
+def desenhar_execucao(execucoes: pd.DataFrame, key_prefix: str):
+    fig_exec = figura_em_cache(execucoes, ("execucao",), lambda: figura_execucao(execucoes))
+    st.plotly_chart(fig_exec, use_container_width=True, key=f"{key_prefix}_exec", config=CONFIG_MODEBAR)
+
+def render_execucao(contexto: ContextoAgregacao, key_prefix: str):
+    if "EXECUÇÃO DA EMENDA" in contexto.df.columns:
+        desenhar_execucao(contexto.obter(contar_execucoes), key_prefix)
     else:
         st.info("Coluna 'EXECUÇÃO DA EMENDA' não encontrada.")
 
 try:
-    df = carregar_dados(CSV_URL)
+    atualizador = obter_atualizador()
+    dataset = atualizador.dataset
+    df = dataset.df
 except Exception as e:
     st.error("❌ Não consegui carregar a planilha. Verifique se está pública (Qualquer pessoa com o link - Leitor).\n\n"
              f"Detalhes: {e}")
     st.stop()
 
-colunas_desejadas = [
-    "STATUS GERAL", "STATUS DA EMENDA", "ANO DA EMENDA", "Nº EMENDA", "Nº REMANEJAMENTO", "SIGEPE / SEI",
-    "DATA OB MS", "MUNICÍPIO", "ENTIDADE", "SUBAÇÃO", "GRUPO DE DESPESA",
-    "MODALIDADE", "VALOR", "PARLAMENTAR", "PARTIDO DO PARLAMENTAR",
-    "PENDÊNCIAS", "SETOR ATUAL ROBÔ", "EXECUÇÃO DA EMENDA"
-]
-colunas_existentes = [c for c in colunas_desejadas if c in df.columns]
-df = df[colunas_existentes].copy()
-
-if "VALOR" in df.columns:
-    df["VALOR"] = pd.to_numeric(df["VALOR"], errors="coerce")
-
-if "DATA OB MS" in df.columns:
-    df["DATA OB MS"] = pd.to_datetime(df["DATA OB MS"], errors="coerce", dayfirst=True)
-
 st.sidebar.header("Filtros")
 
 # --- FUNÇÃO PARA LIMPAR FILTROS ---
@@ -322,273 +334,352 @@ if st.sidebar.button("🧹 Limpar filtros"):
     limpar_filtros()
 
 # --- Função auxiliar dos selects ---
-def select_valor_com_todos(rotulo: str, serie: pd.Series, key: str):
-    """Select com (Todos), retorna None quando selecionado."""
-    valores_unicos = sorted(serie.dropna().unique().tolist())
-    opcoes = ["(Todos)"] + valores_unicos
-    escolha = st.sidebar.selectbox(rotulo, opcoes, key=key)
-    return None if escolha == "(Todos)" else escolha
+def select_valor_com_todos(rotulo: str, valores_unicos: list, key: str):
+    """Seleção múltipla; vazia equivale a (Todos) e retorna None."""
+    escolha = st.sidebar.multiselect(rotulo, valores_unicos, key=key, placeholder="(Todos)")
+    return escolha or None
+
+def slider_intervalo(rotulo: str, limites, converter, key: str):
+    """Slider de intervalo; retorna None enquanto cobre toda a faixa dos dados."""
+    if limites is None:
+        return None
+    minimo, maximo = converter(limites[0]), converter(limites[1])
+    if minimo >= maximo:
+        return None
+    escolha = st.slider(rotulo, min_value=minimo, max_value=maximo, value=(minimo, maximo), key=key)
+    return None if escolha == (minimo, maximo) else escolha
 
 # --- Configuração dos filtros ---
 PRIMEIRAS_OPCOES = ["Nº EMENDA", "SUBAÇÃO", "ANO DA EMENDA", "PARLAMENTAR", "STATUS DA EMENDA", "MUNICÍPIO", "ENTIDADE", "MODALIDADE"]
+FILTROS_INTERVALO = {
+    "VALOR": float,
+    "ANO DA EMENDA": int,
+    "DATA OB MS": lambda d: pd.Timestamp(d).date(),
+}
 opcoes_presentes = [c for c in PRIMEIRAS_OPCOES if c in df.columns]
 
+@st.cache_resource(max_entries=2)
+def obter_motor_filtros(versao: str, _df: pd.DataFrame) -> MotorFiltros:
+    """Índices dos filtros, construídos uma vez por versão dos dados."""
+    return MotorFiltros(_df, PRIMEIRAS_OPCOES, colunas_intervalo=list(FILTROS_INTERVALO))
+
+@st.cache_resource
+def obter_cache_resultados() -> CacheLRU:
+    """Linhas filtradas e agregações por estado de filtros, compartilhadas entre sessões."""
+    return CacheLRU(max_bytes=int(os.environ.get("EMENDAS_CACHE_MB", "256")) * 1024**2)
+
+@st.cache_resource(max_entries=2)
+def obter_texto_normalizado(versao: str, _df: pd.DataFrame) -> TextoNormalizado:
+    """Chaves de texto e situação de execução normalizadas uma vez por versão, na carga."""
+    return TextoNormalizado(_df)
+
+@st.cache_resource(max_entries=2)
+def obter_cubo(versao: str, _df: pd.DataFrame, _texto: TextoNormalizado) -> CuboAgregado:
+    """Cuboides de contagem/soma dos gráficos, montados sob demanda para a versão."""
+    return CuboAgregado(_df, _texto)
+
+# Onde filtros e agregações são avaliados: "pandas" (índices em memória e cubo)
+# ou um banco embutido em disco, "duckdb" ou "sqlite"
+BACKEND = os.environ.get("EMENDAS_BACKEND", "pandas").lower()
+
+@st.cache_resource(max_entries=2)
+def obter_banco_sql(versao: str, _df: pd.DataFrame, _texto: TextoNormalizado):
+    """Cópia da versão no banco SQL configurado; None no backend pandas."""
+    if BACKEND == "pandas":
+        return None
+    return BancoSQL(_df, versao, motor=BACKEND, texto=_texto)
+
+@st.cache_resource(max_entries=2)
+def obter_indice_busca(versao: str, _texto: TextoNormalizado) -> IndiceBusca:
+    """Índice de trigramas da busca sobre as chaves normalizadas, uma vez por versão."""
+    return IndiceBusca(_texto)
+
+motor = obter_motor_filtros(dataset.versao, df)
+texto = obter_texto_normalizado(dataset.versao, df)
+cache_resultados = obter_cache_resultados()
+
+def agregacao_preservada(chave) -> bool:
+    """Agregações de estados de filtros que não alcançam nenhuma linha alterada continuam valendo."""
+    filtros = ContextoAgregacao.filtros_da_chave(chave)
+    return filtros is not None and dataset.delta.preserva(filtros)
+
+# Numa versão nova com poucas linhas alteradas, só o que elas afetam sai do cache
+# (posições de linhas sempre saem: mudam com qualquer inserção ou remoção)
+if dataset.delta is not None and dataset.anterior is not None:
+    cache_resultados.migrar_versao(dataset.versao, dataset.anterior, agregacao_preservada)
+indice_busca = obter_indice_busca(dataset.versao, texto)
+try:
+    banco_sql = obter_banco_sql(dataset.versao, df, texto)
+except Exception as e:
+    st.sidebar.warning(f"⚠️ Backend '{BACKEND}' indisponível; usando pandas. Detalhes: {e}")
+    banco_sql = None
+reset_key = st.session_state.get("reset_key", 0)
+
+# Busca por trecho (sem acentos/caixa); as linhas encontradas são o ponto de
+# partida dos demais filtros
+busca = ""
+posicoes_busca = None
+if indice_busca.colunas:
+    texto_busca = st.sidebar.text_input(
+        "🔎 Buscar em " + ", ".join(indice_busca.colunas) + ":",
+        key=f"busca_{reset_key}",
+        placeholder="trecho do nome ou da pendência",
+    )
+    busca = " ".join(texto_busca.split())
+    if busca:
+        posicoes_busca = cache_resultados.obter(
+            ("busca", busca), lambda: indice_busca.buscar(busca), versao=dataset.versao
+        )
+
+# Intervalos entram antes dos selects para que as opções já reflitam a faixa escolhida
+intervalos = {}  # coluna -> (mínimo, máximo), só dos sliders que não cobrem tudo
+with st.sidebar.expander("Intervalos (VALOR, ANO, DATA OB MS)"):
+    for coluna, converter in FILTROS_INTERVALO.items():
+        if coluna in motor.intervalos:
+            faixa = slider_intervalo(coluna, motor.limites(coluna), converter, key=f"intervalo_{coluna}_{reset_key}")
+            if faixa is not None:
+                intervalos[coluna] = faixa
+
+# (filtro, valores) de cada select preenchido, na ordem da barra lateral
+escolhas = []
+filtros_aplicados = {}  # coluna -> valores, só dos selects diferentes de (Todos)
+
 if not opcoes_presentes:
     st.sidebar.warning("⚠️ Nenhuma das colunas de filtro iniciais existe na planilha.")
-    df_filtrado = df.copy()
-    filtro1 = filtro2 = filtro3 = filtro4 = filtro5 = filtro6 = filtro7 = filtro8 = None
-    valor1 = valor2 = valor3 = valor4 = valor5 = valor6 = valor7 = valor8 = None
 else:
-    reset_key = st.session_state.get("reset_key", 0)
-
-    # 1º filtro
-    filtro1 = st.sidebar.selectbox(
-        "1º filtro:",
-        opcoes_presentes,
-        key=f"filtro1_{reset_key}"
-    )
-    valor1 = select_valor_com_todos(
-        f"Escolha {filtro1}:",
-        df[filtro1],
-        key=f"valor1_{reset_key}"
-    )
-    df_filtrado = df[df[filtro1] == valor1] if valor1 is not None else df.copy()
-
-    # 2º filtro
-    opcoes_segundo = [c for c in opcoes_presentes if c != filtro1]
-    filtro2 = st.sidebar.selectbox(
-        "2º filtro (opcional):",
-        ["(Nenhum)"] + opcoes_segundo,
-        key=f"filtro2_{reset_key}"
-    )
-    if filtro2 != "(Nenhum)" and filtro2 in df_filtrado.columns:
-        valor2 = select_valor_com_todos(
-            f"Escolha {filtro2}:",
-            df_filtrado[filtro2],
-            key=f"valor2_{reset_key}"
-        )
-        if valor2 is not None:
-            df_filtrado = df_filtrado[df_filtrado[filtro2] == valor2]
-    else:
-        filtro2 = None
-        valor2 = None
-
-    # 3º filtro
-    opcoes_terceiro = [c for c in opcoes_presentes if c not in [filtro1, filtro2] and c != "(Nenhum)"]
-    filtro3 = st.sidebar.selectbox(
-        "3º filtro (opcional):",
-        ["(Nenhum)"] + opcoes_terceiro,
-        key=f"filtro3_{reset_key}"
-    )
-    if filtro3 != "(Nenhum)" and filtro3 in df_filtrado.columns:
-        valor3 = select_valor_com_todos(
-            f"Escolha {filtro3}:",
-            df_filtrado[filtro3],
-            key=f"valor3_{reset_key}"
-        )
-        if valor3 is not None:
-            df_filtrado = df_filtrado[df_filtrado[filtro3] == valor3]
-    else:
-        filtro3 = None
-        valor3 = None
-
-    # 4º filtro
-    opcoes_quarto = [c for c in opcoes_presentes if c not in [filtro1, filtro2, filtro3] and c != "(Nenhum)"]
-    filtro4 = st.sidebar.selectbox(
-        "4º filtro (opcional):",
-        ["(Nenhum)"] + opcoes_quarto,
-        key=f"filtro4_{reset_key}"
-    )
-    if filtro4 != "(Nenhum)" and filtro4 in df_filtrado.columns:
-        valor4 = select_valor_com_todos(
-            f"Escolha {filtro4}:",
-            df_filtrado[filtro4],
-            key=f"valor4_{reset_key}"
-        )
-        if valor4 is not None:
-            df_filtrado = df_filtrado[df_filtrado[filtro4] == valor4]
-    else:
-        filtro4 = None
-        valor4 = None
-
-    # 5º filtro
-    opcoes_quinto = [c for c in opcoes_presentes if c not in [filtro1, filtro2, filtro3, filtro4] and c != "(Nenhum)"]
-    filtro5 = st.sidebar.selectbox(
-        "5º filtro (opcional):",
-        ["(Nenhum)"] + opcoes_quinto,
-        key=f"filtro5_{reset_key}"
-    )
-    if filtro5 != "(Nenhum)" and filtro5 in df_filtrado.columns:
-        valor5 = select_valor_com_todos(
-            f"Escolha {filtro5}:",
-            df_filtrado[filtro5],
-            key=f"valor5_{reset_key}"
-        )
-        if valor5 is not None:
-            df_filtrado = df_filtrado[df_filtrado[filtro5] == valor5]
-    else:
-        filtro5 = None
-        valor5 = None
-
-    # 6º filtro
-    opcoes_sexto = [c for c in opcoes_presentes if c not in [filtro1, filtro2, filtro3, filtro4, filtro5] and c != "(Nenhum)"]
-    filtro6 = st.sidebar.selectbox(
-        "6º filtro (opcional):",
-        ["(Nenhum)"] + opcoes_sexto,
-        key=f"filtro6_{reset_key}"
-    )
-    if filtro6 != "(Nenhum)" and filtro6 in df_filtrado.columns:
-        valor6 = select_valor_com_todos(
-            f"Escolha {filtro6}:",
-            df_filtrado[filtro6],
-            key=f"valor6_{reset_key}"
-        )
-        if valor6 is not None:
-            df_filtrado = df_filtrado[df_filtrado[filtro6] == valor6]
-    else:
-        filtro6 = None
-        valor6 = None
-
-    # 7º filtro
-    opcoes_setimo = [c for c in opcoes_presentes if c not in [filtro1, filtro2, filtro3, filtro4, filtro5, filtro6] and c != "(Nenhum)"]
-    filtro7 = st.sidebar.selectbox(
-        "7º filtro (opcional):",
-        ["(Nenhum)"] + opcoes_setimo,
-        key=f"filtro7_{reset_key}"
-    )
-    if filtro7 != "(Nenhum)" and filtro7 in df_filtrado.columns:
-        valor7 = select_valor_com_todos(
-            f"Escolha {filtro7}:",
-            df_filtrado[filtro7],
-            key=f"valor7_{reset_key}"
-        )
-        if valor7 is not None:
-            df_filtrado = df_filtrado[df_filtrado[filtro7] == valor7]
-    else:
-        filtro7 = None
-        valor7 = None
-    
-    # 8º filtro
-    opcoes_oitavo = [c for c in opcoes_presentes if c not in [filtro1, filtro2, filtro3, filtro4, filtro5, filtro6, filtro7] and c != "(Nenhum)"]
-    filtro8 = st.sidebar.selectbox(
-        "8º filtro (opcional):",
-        ["(Nenhum)"] + opcoes_oitavo,
-        key=f"filtro8_{reset_key}"
-    )
-    if filtro8 != "(Nenhum)" and filtro8 in df_filtrado.columns:
-        valor8 = select_valor_com_todos(
-            f"Escolha {filtro8}:",
-            df_filtrado[filtro8],
-            key=f"valor8_{reset_key}"
+    for i in range(1, 9):
+        if i == 1:
+            filtro = st.sidebar.selectbox("1º filtro:", opcoes_presentes, key=f"filtro1_{reset_key}")
+        else:
+            ja_usados = [f for f, _ in escolhas]
+            filtro = st.sidebar.selectbox(
+                f"{i}º filtro (opcional):",
+                ["(Nenhum)"] + [c for c in opcoes_presentes if c not in ja_usados],
+                key=f"filtro{i}_{reset_key}"
+            )
+            if filtro == "(Nenhum)":
+                continue
+
+        # As opções de cada select vêm só das linhas que passaram pelos filtros anteriores
+        valor = select_valor_com_todos(
+            f"Escolha {filtro}:",
+            motor.opcoes(filtro, dict(filtros_aplicados), intervalos, base=posicoes_busca, busca=busca),
+            key=f"valor{i}_{reset_key}"
         )
-        if valor8 is not None:
-            df_filtrado = df_filtrado[df_filtrado[filtro8] == valor8]
-    else:
-        filtro8 = None
-        valor8 = None
-        
+        escolhas.append((filtro, valor))
+        if valor is not None:
+            filtros_aplicados[filtro] = valor
+
+# Linhas filtradas compartilhadas entre sessões com o mesmo estado de filtros;
+# o frame é montado com um único gather, em vez de um frame novo a cada filtro
+estado_filtros = chave_filtros(filtros_aplicados, intervalos, busca)
+posicoes = cache_resultados.obter(
+    ("linhas", estado_filtros),
+    lambda: (
+        banco_sql.filtrar(filtros_aplicados, intervalos) if banco_sql is not None and not busca
+        else motor.filtrar(filtros_aplicados, intervalos, posicoes_busca)
+    ),
+    versao=dataset.versao,
+)
+df_filtrado = motor.frame(posicoes)
+# Gráficos por dimensões do cubo (ou do banco SQL) saem de roll-ups/consultas; os
+# demais, de scans em df_filtrado. Cubo e banco não conhecem a busca: com busca
+# ativa, tudo sai de df_filtrado.
+# O contexto calcula cada agregação uma vez por rerun, para todas as abas
+if busca:
+    consulta_agregada = None
+elif banco_sql is not None:
+    consulta_agregada = ConsultaSQL(banco_sql, filtros_aplicados, intervalos)
+else:
+    consulta_agregada = ConsultaCubo(obter_cubo(dataset.versao, df, texto), filtros_aplicados, intervalos, len(df_filtrado))
+contexto = ContextoAgregacao(df_filtrado, consulta_agregada, cache_resultados, estado_filtros, dataset.versao)
+
 def fmt(filtro, valor):
     if not filtro:
         return None
-    return f"{filtro}: {('Todos' if valor is None else valor)}"
-
-valor_selecionado = " • ".join([x for x in [
-    fmt(filtro1, valor1),
-    fmt(filtro2, valor2),
-    fmt(filtro3, valor3),
-    fmt(filtro4, valor4),
-    fmt(filtro5, valor5),
-    fmt(filtro6, valor6),
-    fmt(filtro7, valor7),
-    fmt(filtro8, valor8),
-] if x])
+    return f"{filtro}: {('Todos' if valor is None else ', '.join(map(str, valor)))}"
+
+valor_selecionado = " • ".join([x for x in [fmt(f, v) for f, v in escolhas] if x] + [
+    f"{c}: {ini} a {fim}" for c, (ini, fim) in intervalos.items()
+] + ([f"Busca: {busca}"] if busca else []))
 
 col1, col2 = st.columns([4, 1])
 
 with col1:
     st.title("📊 Painel de Emendas Parlamentares")
-        # Texto institucional com data/hora atual formatada
-    data_atual = datetime.now().strftime("%d/%m/%Y às %H:%M:%S")
+    # Texto institucional com a versão dos dados em uso e sua idade
+    data_dados = datetime.fromtimestamp(dataset.carregado_em).strftime("%d/%m/%Y às %H:%M:%S")
+    minutos_verificacao = int((datetime.now().timestamp() - (atualizador.verificado_em or dataset.carregado_em)) // 60)
+    situacao = "🔄 atualizando…" if atualizador.atualizando else f"verificada há {minutos_verificacao} min"
+    if dataset.delta is not None:
+        situacao += f"; última alteração: {dataset.delta.resumo()}"
     st.markdown(
         f"""
         <div style="color:#666; font-size:0.95em; line-height:1.3;">
             <strong>Secretaria da Saúde - Governo de Pernambuco</strong><br>
-            Última atualização: {data_atual}
+            Última atualização dos dados: {data_dados}
+            (versão {dataset.versao[:8] or "-"}, {situacao})
         </div>
         """,
         unsafe_allow_html=True
     )
+    for nome_fonte, erro_fonte in atualizador.erros_fontes.items():
+        st.caption(f"⚠️ Falha ao carregar a fonte '{nome_fonte}' (usando a última versão salva, se houver). Detalhes: {erro_fonte}")
+    if atualizador.ultimo_erro is not None:
+        st.caption(f"⚠️ Falha na última atualização; exibindo a versão anterior. Detalhes: {atualizador.ultimo_erro}")
 
 with col2:
     st.markdown("<div style='margin-top: 35px;'></div>", unsafe_allow_html=True)
-    try:
-        st.image("logo.svg", width=200)
-    except:
-        pass
-
-st.subheader("Dados Filtrados")
-if valor_selecionado:
-        st.caption(f"Filtros aplicados: {valor_selecionado}")
-
-st.caption(f"{len(df_filtrado)} registros exibidos após os filtros aplicados.")
-
-st.download_button(
-    "⬇️ Exportar Dados",
-    data=df_filtrado.to_csv(index=False).encode("utf-8"),
-    file_name="emendas_filtrado.csv",
-    mime="text/csv",
-)
+    logo = logo_otimizado("logo.svg")
+    if logo is not None:
+        st.markdown(logo.img(static_servido(), largura=200), unsafe_allow_html=True)
+
+# Tabela e gráficos são fragments: seus próprios widgets reexecutam só o
+# fragment (sem autenticação, carga, filtros...); mudanças de filtro, na
+# barra lateral, reexecutam o script inteiro e chegam aqui pelos argumentos
+TAMANHOS_PAGINA = [50, 100, 500, 1000]
+
+def ordem_linhas(df_filtrado: pd.DataFrame, coluna: str, crescente: bool) -> np.ndarray:
+    """Posições de df_filtrado ordenadas por `coluna` (estável; nulos no fim)."""
+    serie = df_filtrado[coluna].reset_index(drop=True)
+    return serie.sort_values(ascending=crescente, na_position="last", kind="stable").index.to_numpy()
+
+@st.fragment
+def secao_dados(df_filtrado: pd.DataFrame, valor_selecionado: str, estado_filtros: tuple, versao: str):
+    st.subheader("Dados Filtrados")
+    if valor_selecionado:
+            st.caption(f"Filtros aplicados: {valor_selecionado}")
+
+    st.caption(f"{len(df_filtrado)} registros exibidos após os filtros aplicados.")
+
+    # Exportação gerada só no clique (data como função, fora do rerun) e guardada
+    # em disco por versão, estado de filtros e formato. O conteúdo ainda passa
+    # inteiro pela memória no clique (o Streamlit o guarda até o download)
+    col_formato, col_exportar = st.columns([1, 4], vertical_alignment="bottom")
+    formato = col_formato.selectbox("Formato:", list(FORMATOS), key="exportar_formato")
+    col_exportar.download_button(
+        "⬇️ Exportar Dados",
+        data=lambda: conteudo_exportacao(
+            df_filtrado, formato, versao, estado_filtros, versao_atual=obter_atualizador().dataset.versao
+        ),
+        file_name=f"emendas_filtrado.{FORMATOS[formato].extensao}",
+        mime=FORMATOS[formato].mime,
+        on_click="ignore",
+    )
 
-st.dataframe(df_filtrado, use_container_width=True)
+    # Tabela paginada no servidor: só a página visível é serializada e enviada.
+    # A ordenação fica em cache por estado de filtros, coluna e sentido
+    col_ordem, col_sentido, col_tamanho, col_pagina = st.columns([2, 1, 1, 1])
+    coluna_ordem = col_ordem.selectbox("Ordenar por:", ["(Original)"] + list(df_filtrado.columns), key="tabela_ordem")
+    crescente = col_sentido.radio("Ordem:", ["Crescente", "Decrescente"], horizontal=True, key="tabela_sentido") == "Crescente"
+    tamanho_pagina = col_tamanho.selectbox("Linhas por página:", TAMANHOS_PAGINA, key="tabela_tamanho")
+    total_paginas = max(1, -(-len(df_filtrado) // tamanho_pagina))
+    pagina = col_pagina.number_input(
+        f"Página (de {total_paginas}):", min_value=1, max_value=total_paginas, value=1,
+        key=f"tabela_pagina_{hash((estado_filtros, coluna_ordem, crescente, tamanho_pagina))}",
+    )
 
-st.sidebar.header("Gráficos (configuração)")
+    inicio = (pagina - 1) * tamanho_pagina
+    if coluna_ordem == "(Original)":
+        pagina_df = df_filtrado.iloc[inicio:inicio + tamanho_pagina]
+    else:
+        ordem = cache_resultados.obter(
+            ("ordem", estado_filtros, coluna_ordem, crescente),
+            lambda: ordem_linhas(df_filtrado, coluna_ordem, crescente),
+            versao=versao,
+        )
+        pagina_df = df_filtrado.take(ordem[inicio:inicio + tamanho_pagina])
+
+    st.dataframe(pagina_df, use_container_width=True)
+    if len(df_filtrado):
+        st.caption(f"Linhas {inicio + 1}–{inicio + len(pagina_df)} de {len(df_filtrado)}.")
+
+@st.fragment
+def area_graficos(contexto: ContextoAgregacao, candidatos_dim: list):
+    figuras_enviadas.clear()
+
+    # Controles no próprio fragment (fragments não escrevem na barra lateral)
+    with st.expander("⚙️ Gráficos (configuração)"):
+        col_dim, col_top, col_parl, col_ano = st.columns([2, 1, 1, 1])
+        dimensao_geral = col_dim.selectbox(
+            "Dimensão (Visão Geral):",
+            options=candidatos_dim,
+            index=(candidatos_dim.index("ENTIDADE") if "ENTIDADE" in candidatos_dim else 0)
+        )
+        top_n_geral = col_top.slider("Top N (Visão Geral):", 3, 50, 15)
+        # Por Parlamentar
+        top_n_parl = col_parl.slider("Top N Parlamentares:", 3, 50, 12)
+        # Gráfico de barras agrupadas
+        top_n_ano = col_ano.slider("Top N Ano:", 3, 50, 5)
+    metrica_geral = "Contagem"
+    tipo_grafico_geral = "Barras"
+    tipo_grafico_parl = "Barras"
+    agregacao_hm = "Contagem"
+
+    # Só a aba selecionada roda (on_change="rerun"); a escolha fica em session_state
+    # e as agregações das outras abas são calculadas na primeira visita
+    tab_visao, tab_parlamentar, tab_heatmap, tab_execucao = st.tabs(
+        ["📊 Panorama Geral", "🧑‍⚖️ Análise por Parlamentar", "📅 Status por ano", "⚙️ Situação das Emendas"],
+        key="aba_ativa",
+        on_change="rerun",
+    )
 
-candidatos_dim = [c for c in df_filtrado.columns if c not in ["VALOR", "DATA OB MS"]]
-if not candidatos_dim:
-    candidatos_dim = [c for c in df.columns if c not in ["VALOR", "DATA OB MS"]]
+    with tab_visao:
+        if tab_visao.open:
+            base = contexto.obter(dados_por_dimensao, dimensao_geral, metrica_geral, top_n_geral)
+            grafico_generico(
+                base, dimensao_geral, tipo_grafico_geral,
+                f"QUANTIDADE POR {dimensao_geral} (TOP {len(base)})",
+                key="vg_main"
+            )
 
-dimensao_geral = st.sidebar.selectbox(
-    "Dimensão (Visão Geral):",
-    options=candidatos_dim,
-    index=(candidatos_dim.index("ENTIDADE") if "ENTIDADE" in candidatos_dim else 0)
-)
-metrica_geral = "Contagem"
-tipo_grafico_geral = "Barras"
-top_n_geral = st.sidebar.slider("Top N (Visão Geral):", 3, 50, 15)
-
-# Por Parlamentar
-tipo_grafico_parl = "Barras"
-top_n_parl = st.sidebar.slider("Top N Parlamentares:", 3, 50, 12)
-
-# Gráfico de barras agrupadas
-agregacao_hm = "Contagem"
-top_n_ano = st.sidebar.slider("Top N Ano:", 3, 50, 5)
-# Execução
-tipo_grafico_exec = "Barras"
-
-tab_visao, tab_parlamentar, tab_heatmap, tab_execucao = st.tabs(
-    ["📊 Panorama Geral", "🧑‍⚖️ Análise por Parlamentar", "📅 Status por ano", "⚙️ Situação das Emendas"]
-)
+            render_por_parlamentar(contexto, top_n_parl, tipo_grafico_parl, key_prefix="vg_parl")
 
-with tab_visao:
-    base = agrega_por_dimensao(df_filtrado, dimensao_geral, metrica_geral).head(top_n_geral)
-    grafico_generico(
-        base, dimensao_geral, tipo_grafico_geral,
-        f"QUANTIDADE POR {dimensao_geral} (TOP {len(base)})",
-        key="vg_main"
-    )
+            render_barraAgrupada(contexto, agregacao_hm, top_n_ano, key_prefix="vg_hm")
+
+            render_execucao(contexto, key_prefix="vg_exec")
 
-    render_por_parlamentar(df_filtrado, top_n_parl, tipo_grafico_parl, key_prefix="vg_parl")
+    with tab_parlamentar:
+        if tab_parlamentar.open:
+            render_por_parlamentar(contexto, top_n_parl, tipo_grafico_parl, key_prefix="tab_parl")
 
-    render_barraAgrupada(df_filtrado, agregacao_hm, top_n_ano, key_prefix="vg_hm")
+    with tab_heatmap:
+        if tab_heatmap.open:
+            render_barraAgrupada(contexto, agregacao_hm, top_n_ano, key_prefix="tab_hm")
 
-    render_execucao(df_filtrado, key_prefix="vg_exec")
+    with tab_execucao:
+        if tab_execucao.open:
+            render_execucao(contexto, key_prefix="tab_exec")
 
-with tab_parlamentar:
-    render_por_parlamentar(df_filtrado, top_n_parl, tipo_grafico_parl, key_prefix="tab_parl")
+secao_dados(df_filtrado, valor_selecionado, estado_filtros, dataset.versao)
 
-with tab_heatmap:
-    render_barraAgrupada(df_filtrado, agregacao_hm, top_n_ano, key_prefix="tab_hm")
+candidatos_dim = [c for c in df_filtrado.columns if c not in ["VALOR", "DATA OB MS"]]
+if not candidatos_dim:
+    candidatos_dim = [c for c in df.columns if c not in ["VALOR", "DATA OB MS"]]
 
-with tab_execucao:
-    render_execucao(df_filtrado, key_prefix="tab_exec")
\ No newline at end of file
+area_graficos(contexto, candidatos_dim)
+
+# Contadores dos caches compartilhados e custo deste rerun, para quem opera o painel
+if (st.session_state.get("user_info") or {}).get("role") == "admin":
+    with st.sidebar.expander("🛠️ Diagnóstico"):
+        st.caption("Este rerun")
+        st.json({
+            "aba": st.session_state.get("aba_ativa"),
+            "tempo (ms)": round((time.perf_counter() - inicio_rerun) * 1000, 1),
+            "gráficos enviados": len(figuras_enviadas),
+            "KB de figuras": round(sum(figuras_enviadas) / 1024, 1),
+        })
+        st.caption("Cache de resultados (linhas filtradas e agregações)")
+        st.json(cache_resultados.estatisticas())
+        st.caption("Cache de figuras")
+        st.json(obter_cache_figuras().estatisticas())
+        if logo is not None:
+            tag_logo = logo.img(static_servido(), largura=200)
+            st.caption("Ativos estáticos (por carregamento de página)")
+            st.json({
+                "logo original (KB)": round(logo.tamanho_original / 1024, 1),
+                "logo otimizado (KB)": round(len(logo.conteudo) / 1024, 1),
+                "servido por referência": static_servido(),
+                "enviado na página (KB)": round(len(tag_logo) / 1024, 2),
+                "economia (KB)": round((logo.tamanho_original - len(tag_logo)) / 1024, 1),
+            })
@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmark import gerar_csv_sintetico  # noqa: E402
+from dados import ler_csv_tipado  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def csv_emendas(tmp_path_factory):
+    """Exportação sintética pequena (3000 linhas), como chega da fonte"""
+    caminho = tmp_path_factory.mktemp("dados") / "emendas.csv"
+    gerar_csv_sintetico(3000, caminho, semente=7)
+    return caminho
+
+
+@pytest.fixture(scope="session")
+def df_emendas(csv_emendas):
+    """Exportação sintética pequena, lida como no painel (colunas podadas e tipadas)"""
+    return ler_csv_tipado(csv_emendas)
+
+
+def mesmo_resultado(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Mesmas linhas (em qualquer ordem), com a métrica comparada com tolerância"""
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    chaves = [c for c in a.columns if c not in ("Métrica", "QUANTIDADE")]
+    ordenar = lambda x: x.assign(**{c: x[c].astype(str) for c in chaves}).sort_values(chaves).reset_index(drop=True)
+    a, b = ordenar(a), ordenar(b)
+    medida = [c for c in a.columns if c not in chaves]
+    return a[chaves].equals(b[chaves]) and np.allclose(a[medida].to_numpy(float), b[medida].to_numpy(float))
@@ -0,0 +1,56 @@
+import pytest
+
+from agregacoes import ConsultaCubo, CuboAgregado, agrega_por_dimensao, agrupar_ano_status, contar_execucoes, serie_mensal
+from conftest import mesmo_resultado
+from filtros import MotorFiltros
+from texto import TextoNormalizado
+
+CENARIOS = {
+    "sem filtros": ({}, {}),
+    "1 parlamentar": ({"PARLAMENTAR": ["Dep. 7"]}, {}),
+    "municípios + ano": ({"MUNICÍPIO": ["Município 1", "Município 2", "Município 3"]}, {"ANO DA EMENDA": (2022, 2024)}),
+    "status + modalidade": ({"STATUS DA EMENDA": ["PAGA", "APROVADA"], "MODALIDADE": ["Convênio"]}, {}),
+}
+AGREGACOES = {
+    "parlamentar": lambda df, c: agrega_por_dimensao(df, "PARLAMENTAR", "Soma de VALOR", c),
+    "município": lambda df, c: agrega_por_dimensao(df, "MUNICÍPIO", "Contagem", c),
+    "ano x status": lambda df, c: agrupar_ano_status(df, "Contagem", c),
+    "mês": lambda df, c: serie_mensal(df, c),
+    "execução": lambda df, c: contar_execucoes(df, c),
+}
+
+
+@pytest.fixture(scope="module")
+def motor(df_emendas):
+    return MotorFiltros(df_emendas, ["PARLAMENTAR", "MUNICÍPIO", "STATUS DA EMENDA", "MODALIDADE"], ["ANO DA EMENDA"])
+
+
+@pytest.mark.parametrize("cenario", CENARIOS)
+@pytest.mark.parametrize("agregacao", AGREGACOES)
+def test_cubo_igual_ao_scan(df_emendas, motor, cenario, agregacao):
+    filtros, intervalos = CENARIOS[cenario]
+    sub = motor.frame(motor.filtrar(filtros, intervalos))
+    consulta = ConsultaCubo(CuboAgregado(df_emendas, fracao_maxima=1.0), filtros, intervalos)
+    calcular = AGREGACOES[agregacao]
+    assert mesmo_resultado(calcular(sub, None), calcular(sub, consulta))
+
+
+def test_cuboides_grandes_ficam_de_fora(df_emendas):
+    cubo = CuboAgregado(df_emendas, fracao_maxima=0.05)
+    assert cubo.cuboide(["STATUS GERAL"]) is not None
+    assert cubo.cuboide(["MUNICÍPIO", "PARLAMENTAR"]) is None
+    assert not ConsultaCubo(cubo, {"MUNICÍPIO": ["Município 1"]}).responde(["PARLAMENTAR"])
+    estatisticas = cubo.estatisticas()
+    assert estatisticas["células"] < estatisticas["linhas"] * 0.05
+
+
+def test_scan_quando_o_frame_filtrado_e_menor_que_o_cuboide(df_emendas):
+    cubo = CuboAgregado(df_emendas, fracao_maxima=1.0)
+    assert ConsultaCubo(cubo, {}, linhas=len(df_emendas)).responde(["PARLAMENTAR"])
+    assert not ConsultaCubo(cubo, {"PARLAMENTAR": ["Dep. 7"]}, linhas=10).responde(["MUNICÍPIO"])
+
+
+def test_situacao_normalizada_na_carga(df_emendas):
+    texto = TextoNormalizado(df_emendas)
+    consulta = ConsultaCubo(CuboAgregado(df_emendas, texto, fracao_maxima=1.0), {})
+    assert mesmo_resultado(contar_execucoes(df_emendas), contar_execucoes(df_emendas, consulta))
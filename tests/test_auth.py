@@ -0,0 +1,154 @@
+import base64
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import bcrypt
+import pytest
+
+import auth
+from auth import LOGIN_BLOQUEADO, LOGIN_INVALIDO, LOGIN_OK, AuthManager, LimitadorTentativas, TokensSessao, VerificadorSenhas
+
+USUARIOS = SimpleNamespace(users={"ana": {"role": "admin", "password": "hash-da-senha"}})
+
+
+def test_token_valido_e_adulterado(tmp_path):
+    tokens = TokensSessao(b"segredo", arquivo_revogados=tmp_path / "revogados.json")
+    token = tokens.emitir("ana", "admin", "hash-da-senha")
+    assert tokens.validar(token, USUARIOS) == "ana"
+    carga, _, assinatura = token.partition(".")
+    assert tokens.validar(f"{carga}.{assinatura[::-1]}", USUARIOS) is None
+    assert TokensSessao(b"outro").validar(token, USUARIOS) is None
+
+
+def test_token_expirado():
+    tokens = TokensSessao(b"segredo", validade=-1)
+    assert tokens.validar(tokens.emitir("ana", "admin", "hash-da-senha"), USUARIOS) is None
+
+
+def test_revogacao_sobrevive_a_reinicio(tmp_path):
+    arquivo = tmp_path / "revogados.json"
+    token = TokensSessao(b"segredo", arquivo_revogados=arquivo).emitir("ana", "admin", "hash-da-senha")
+    outro = TokensSessao(b"segredo", arquivo_revogados=arquivo).emitir("ana", "admin", "hash-da-senha")
+    TokensSessao(b"segredo", arquivo_revogados=arquivo).revogar(token)
+
+    reiniciado = TokensSessao(b"segredo", arquivo_revogados=arquivo)
+    assert reiniciado.validar(token, USUARIOS) is None
+    assert reiniciado.validar(outro, USUARIOS) == "ana"
+
+
+def test_revogacao_vista_por_outro_processo(tmp_path):
+    arquivo = tmp_path / "revogados.json"
+    a = TokensSessao(b"segredo", arquivo_revogados=arquivo)
+    b = TokensSessao(b"segredo", arquivo_revogados=arquivo)
+    token = a.emitir("ana", "admin", "hash-da-senha")
+    assert b.validar(token, USUARIOS) == "ana"
+    time.sleep(0.01)
+    a.revogar(token)
+    assert b.validar(token, USUARIOS) is None
+
+
+def _token_assinado(tokens, dados, hash_senha="hash-da-senha"):
+    carga = base64.urlsafe_b64encode(json.dumps(dados).encode("utf-8")).decode().rstrip("=")
+    return f"{carga}.{tokens._assinatura(carga, hash_senha)}"
+
+
+def test_carga_adulterada_e_recusada():
+    tokens = TokensSessao(b"segredo")
+    token = tokens.emitir("ana", "admin", "hash-da-senha")
+    _, _, assinatura = token.partition(".")
+    outra = base64.urlsafe_b64encode(json.dumps(["ana", "admin", 2**40, "x"]).encode("utf-8")).decode().rstrip("=")
+    assert tokens.validar(f"{outra}.{assinatura}", USUARIOS) is None
+    assert tokens.validar("nao-e-base64!.x", USUARIOS) is None
+    assert tokens.validar("", USUARIOS) is None
+
+
+@pytest.mark.parametrize("dados", [
+    ["ana", "admin", "x", "y"],
+    [["a"], "admin", 1, "y"],
+    ["ana", "admin", True, "y"],
+    ["ana", None, 2**40, "y"],
+    ["ana", "admin", 2**40, 7],
+    {"ana": "admin"},
+    ["ana", "admin", 2**40],
+])
+def test_carga_assinada_com_tipos_errados(dados):
+    tokens = TokensSessao(b"segredo")
+    assert tokens.validar(_token_assinado(tokens, dados), USUARIOS) is None
+    tokens.revogar(_token_assinado(tokens, dados))  # não deve levantar
+
+
+def test_limitador_bloqueia_apos_n_falhas():
+    limitador = LimitadorTentativas(max_falhas=3, janela=60, bloqueio=60)
+    for _ in range(2):
+        limitador.registrar_falha("usuario:ana", "ip:1")
+    assert limitador.espera("usuario:ana", "ip:1") == 0
+    limitador.registrar_falha("usuario:ana", "ip:1")
+    assert 0 < limitador.espera("usuario:ana") <= 60
+    assert limitador.espera("ip:1") > 0
+    assert limitador.espera("usuario:bia", "ip:2") == 0
+    limitador.limpar("usuario:ana")
+    assert limitador.espera("usuario:ana") == 0 and limitador.espera("ip:1") > 0
+
+
+def test_limitador_descarta_falhas_fora_da_janela():
+    limitador = LimitadorTentativas(max_falhas=2, janela=0.05, bloqueio=60)
+    limitador.registrar_falha("usuario:ana")
+    time.sleep(0.1)
+    limitador.registrar_falha("usuario:ana")
+    assert limitador.espera("usuario:ana") == 0
+
+
+@pytest.fixture
+def gerenciador(tmp_path, monkeypatch):
+    """AuthManager com um usuário (hash barato) e limitador próprio, sem tocar no estado global"""
+    credenciais = tmp_path / "credentials.json"
+    credenciais.write_text(json.dumps({"ana": {
+        "password": bcrypt.hashpw(b"certa", bcrypt.gensalt(rounds=4)).decode(), "name": "Ana", "role": "admin",
+    }}), encoding="utf-8")
+    monkeypatch.setattr(auth, "LIMITADOR", LimitadorTentativas(max_falhas=3, janela=60, bloqueio=60))
+    return AuthManager(str(credenciais))
+
+
+def test_autenticar_bloqueia_por_usuario_e_por_ip(gerenciador):
+    for _ in range(3):
+        assert gerenciador.autenticar("ana", "errada", "10.0.0.1") == LOGIN_INVALIDO
+    assert gerenciador.autenticar("ana", "certa", "10.0.0.2") == LOGIN_BLOQUEADO  # usuário bloqueado
+    assert gerenciador.autenticar("bia", "x", "10.0.0.1") == LOGIN_BLOQUEADO  # IP bloqueado
+    assert gerenciador.autenticar("bia", "x", "10.0.0.3") == LOGIN_INVALIDO
+
+
+def test_sucesso_zera_falhas_do_usuario(gerenciador):
+    for _ in range(2):
+        assert gerenciador.autenticar("ana", "errada") == LOGIN_INVALIDO
+    assert gerenciador.autenticar("ana", "certa") == LOGIN_OK
+    for _ in range(2):
+        assert gerenciador.autenticar("ana", "errada") == LOGIN_INVALIDO
+    assert gerenciador.autenticar("ana", "certa") == LOGIN_OK
+
+
+def test_usuario_inexistente_verifica_hash_ficticio(gerenciador, monkeypatch):
+    verificados = []
+    monkeypatch.setattr(auth.VERIFICADOR, "verificar", lambda senha, hashed: verificados.append(hashed) or True)
+    assert gerenciador.autenticar("ninguem", "certa") == LOGIN_INVALIDO
+    assert verificados == [auth.VERIFICADOR.hash_ficticio()]
+    assert bcrypt.checkpw(b"certa", verificados[0].encode()) is False
+
+
+def test_hash_ficticio_gerado_uma_vez(monkeypatch):
+    gerados = []
+    monkeypatch.setattr(auth, "_gerar_hash_ficticio", lambda: gerados.append(1) or f"hash-{len(gerados)}")
+    verificador = VerificadorSenhas(max_workers=4)
+    futuros = [verificador.aquecer() for _ in range(8)]
+    assert all(f is futuros[0] for f in futuros)
+    assert {verificador.hash_ficticio() for _ in range(8)} == {"hash-1"}
+    assert gerados == [1]
+
+
+def test_importar_nao_cria_chave(tmp_path):
+    raiz = Path(__file__).resolve().parents[1]
+    subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {str(raiz)!r}); import auth"], cwd=tmp_path, check=True)
+    assert not (tmp_path / ".cache").exists()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agregacoes import agrega_por_dimensao, agrupar_ano_status, contar_execucoes, serie_mensal
+from banco_sql import MOTORES_SQL, BancoSQL, ConsultaSQL
+from conftest import mesmo_resultado
+from filtros import MotorFiltros
+
+CENARIOS = {
+    "sem filtros": ({}, {}),
+    "1 parlamentar": ({"PARLAMENTAR": ["Dep. 7"]}, {}),
+    "municípios + ano + valor": (
+        {"MUNICÍPIO": ["Município 1", "Município 2", "Município 3"]},
+        {"ANO DA EMENDA": (2022, 2024), "VALOR": (10_000.0, 900_000.0)},
+    ),
+    "data OB": ({"STATUS GERAL": ["PENDENTE"]}, {"DATA OB MS": (pd.Timestamp(2022, 1, 1).date(), pd.Timestamp(2023, 6, 30).date())}),
+}
+AGREGACOES = {
+    "parlamentar": lambda df, c: agrega_por_dimensao(df, "PARLAMENTAR", "Soma de VALOR", c),
+    "ano": lambda df, c: agrega_por_dimensao(df, "ANO DA EMENDA", "Contagem", c),
+    "ano x status": lambda df, c: agrupar_ano_status(df, "Contagem", c),
+    "mês": lambda df, c: serie_mensal(df, c),
+    "execução": lambda df, c: contar_execucoes(df, c),
+}
+
+
+@pytest.fixture(scope="module")
+def motor(df_emendas):
+    return MotorFiltros(df_emendas, ["PARLAMENTAR", "MUNICÍPIO", "STATUS GERAL"], ["ANO DA EMENDA", "VALOR", "DATA OB MS"])
+
+
+@pytest.fixture(scope="module", params=MOTORES_SQL)
+def banco(request, df_emendas, tmp_path_factory):
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb")
+    banco = BancoSQL(df_emendas, "teste", motor=request.param, diretorio=tmp_path_factory.mktemp(request.param))
+    yield banco
+    banco.fechar()
+
+
+@pytest.mark.parametrize("cenario", CENARIOS)
+def test_filtrar_igual_ao_pandas(df_emendas, motor, banco, cenario):
+    filtros, intervalos = CENARIOS[cenario]
+    todas = np.arange(len(df_emendas))
+    esperado, obtido = motor.filtrar(filtros, intervalos), banco.filtrar(filtros, intervalos)
+    assert np.array_equal(todas if esperado is None else esperado, todas if obtido is None else obtido)
+
+
+@pytest.mark.parametrize("cenario", CENARIOS)
+@pytest.mark.parametrize("agregacao", AGREGACOES)
+def test_agregar_igual_ao_scan(motor, banco, cenario, agregacao):
+    filtros, intervalos = CENARIOS[cenario]
+    sub = motor.frame(motor.filtrar(filtros, intervalos))
+    calcular = AGREGACOES[agregacao]
+    assert mesmo_resultado(calcular(sub, None), calcular(sub, ConsultaSQL(banco, filtros, intervalos)))
+
+
+def test_motor_desconhecido(df_emendas, tmp_path):
+    with pytest.raises(ValueError):
+        BancoSQL(df_emendas, "teste", motor="postgres", diretorio=tmp_path)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from busca import COLUNAS_BUSCA, IndiceBusca
+from texto import TextoNormalizado, normalizar_txt
+
+CONSULTAS = [
+    "entidade 15", "CERTIDÃO", "certidao", "pab", "plano trabalho 7", "Custeio  MAC",
+    "e", "15", "ç", "  ", "", "inexistente", "ão", "a.b", "(x)", "c++", "[abc]", "*", "50%", "\\d",
+]
+
+
+def _busca_ingenua(df, texto):
+    """Referência: str.contains literal sobre o texto normalizado de cada coluna"""
+    termos = normalizar_txt(texto).split()
+    if not termos:
+        return None
+    selecionadas = np.ones(len(df), dtype=bool)
+    for termo in termos:
+        linhas = np.zeros(len(df), dtype=bool)
+        for coluna in COLUNAS_BUSCA:
+            normalizado = df[coluna].astype(object).map(normalizar_txt, na_action="ignore")
+            linhas |= normalizado.str.contains(termo, regex=False).fillna(False).to_numpy(dtype=bool)
+        selecionadas &= linhas
+    return np.flatnonzero(selecionadas)
+
+
+@pytest.fixture(scope="module")
+def df_texto():
+    """Grafias com acento/caixa variados, metacaracteres de regex e nulos"""
+    return pd.DataFrame({
+        "ENTIDADE": ["Fundação São José", "FUNDACAO SAO JOSE", "a.b (x)", "axb x", "c++ [abc]", None, "50% * \\d"],
+        "SUBAÇÃO": pd.Categorical(["Custeio PAB", "custeio pab", "Investimento", None, "CUSTEIO MAC", "Custeio MAC", "Ç"]),
+        "PENDÊNCIAS": pd.array(["Falta certidão", None, "FALTA CERTIDAO", "ok", "", "Certidão vencida", None], dtype="string"),
+    })
+
+
+@pytest.mark.parametrize("consulta", CONSULTAS + ["são josé", "SAO", "fundacao jose", "ab", "axb", "abc]", "ç ab"])
+def test_buscar_igual_str_contains_em_frame_pequeno(df_texto, consulta):
+    resultado = IndiceBusca(TextoNormalizado(df_texto)).buscar(consulta)
+    esperado = _busca_ingenua(df_texto, consulta)
+    assert (resultado is None and esperado is None) or np.array_equal(resultado, esperado)
+
+
+@pytest.fixture(scope="module")
+def indice(df_emendas):
+    return IndiceBusca(TextoNormalizado(df_emendas))
+
+
+@pytest.mark.parametrize("consulta", CONSULTAS)
+def test_buscar_igual_str_contains(df_emendas, indice, consulta):
+    resultado = indice.buscar(consulta)
+    esperado = _busca_ingenua(df_emendas, consulta)
+    assert (resultado is None and esperado is None) or np.array_equal(resultado, esperado)
+
+
+def test_sem_colunas_de_busca():
+    assert IndiceBusca(TextoNormalizado(pd.DataFrame({"VALOR": [1.0]}))).buscar("x") is None
@@ -0,0 +1,39 @@
+from cache import CacheLRU
+
+
+def test_versao_nova_descarta_itens_da_anterior():
+    cache = CacheLRU(max_bytes=1 << 20)
+    assert cache.obter("a", lambda: 1, versao="v1") == 1
+    assert cache.obter("a", lambda: 2, versao="v2") == 2
+    assert cache.estatisticas()["invalidações"] == 1
+
+
+def test_versao_antiga_nao_derruba_a_atual():
+    cache = CacheLRU(max_bytes=1 << 20)
+    cache.obter("a", lambda: "v1", versao="v1")
+    cache.obter("a", lambda: "v2", versao="v2")
+    for _ in range(3):
+        assert cache.obter("a", lambda: "v1", versao="v1") == "v1"
+        assert cache.obter("a", lambda: "errado", versao="v2") == "v2"
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["acertos"], estatisticas["invalidações"]) == (3, 1)
+    assert estatisticas["pedidos de versões antigas"] == 3
+
+
+def test_limite_de_bytes_despeja_os_menos_usados():
+    cache = CacheLRU(max_bytes=25, tamanho=lambda valor: 10)
+    for chave in "abc":
+        cache.obter(chave, lambda: chave)
+    assert cache.obter("a", lambda: "recalculado") == "recalculado"
+    assert cache.estatisticas()["despejos"] >= 1
+
+
+def test_migrar_versao_mantem_so_o_que_ainda_vale():
+    cache = CacheLRU(max_bytes=1 << 20)
+    cache.obter(("manter", 1), lambda: "a", versao="v1")
+    cache.obter(("descartar", 2), lambda: "b", versao="v1")
+    cache.migrar_versao("v2", "v1", lambda chave: chave[0] == "manter")
+    assert cache.obter(("manter", 1), lambda: "recalculado", versao="v2") == "a"
+    assert cache.obter(("descartar", 2), lambda: "recalculado", versao="v2") == "recalculado"
+    cache.migrar_versao("v3", "v1", lambda chave: True)  # o cache não está em v1: nada muda
+    assert cache.obter(("manter", 1), lambda: "recalculado", versao="v2") == "a"
@@ -0,0 +1,252 @@
+import hashlib
+import http.server
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from agregacoes import dados_por_dimensao
+import dados
+from dados import (
+    ESQUEMA,
+    AtualizadorDados,
+    SnapshotStore,
+    baixar_csv,
+    carregar_fontes,
+    comparar_versoes,
+    ler_csv,
+    ler_csv_tipado,
+)
+
+
+def test_leitura_em_blocos_igual_a_leitura_unica(csv_emendas, df_emendas, monkeypatch):
+    blocos = []
+    unir_frames = dados.unir_frames
+    monkeypatch.setattr(dados, "unir_frames", lambda frames: blocos.extend(frames) or unir_frames(frames))
+
+    em_blocos = ler_csv_tipado(csv_emendas, orcamento_mb=0.01)
+    assert len(blocos) == 3  # 1000 linhas por bloco, o mínimo
+    pd.testing.assert_frame_equal(em_blocos, df_emendas)
+    assert (em_blocos.dtypes == df_emendas.dtypes).all()
+
+    categoricas = [c for c, tipo in ESQUEMA.items() if tipo == "category" and c in em_blocos.columns]
+    assert categoricas
+    for coluna in categoricas:
+        por_bloco = [set(b[coluna].cat.categories) for b in blocos]
+        assert set(em_blocos[coluna].cat.categories) == set().union(*por_bloco)
+        assert list(em_blocos[coluna].cat.categories) == sorted(em_blocos[coluna].cat.categories)
+    # Pelo menos uma coluna tem categorias que só aparecem em alguns blocos
+    assert any(len({frozenset(b[c].cat.categories) for b in blocos}) > 1 for c in categoricas)
+
+
+def _nova_versao(df):
+    """Muda VALOR das emendas de um parlamentar e acrescenta uma emenda dele"""
+    novo = df.copy()
+    alteradas = novo["PARLAMENTAR"] == "Dep. 1"
+    novo.loc[alteradas, "VALOR"] = novo.loc[alteradas, "VALOR"] + 1
+    inserida = novo[alteradas].head(1).assign(**{"Nº EMENDA": "NOVA"})
+    return pd.concat([novo, inserida], ignore_index=True)
+
+
+def test_delta_por_chave_de_linha(df_emendas):
+    novo = _nova_versao(df_emendas)
+    delta = comparar_versoes(df_emendas, novo)
+    alteradas = int((df_emendas["PARLAMENTAR"] == "Dep. 1").sum())
+    assert (len(delta.inseridas), len(delta.atualizadas), len(delta.removidas)) == (1, alteradas, 0)
+    assert delta.particoes["PARLAMENTAR"] == {"Dep. 1"}
+    assert comparar_versoes(df_emendas, df_emendas.copy()).vazio
+
+
+def test_preserva_so_estados_sem_linhas_alteradas(df_emendas):
+    novo = _nova_versao(df_emendas)
+    delta = comparar_versoes(df_emendas, novo)
+    assert not delta.preserva({})
+    assert not delta.preserva({"PARLAMENTAR": ["Dep. 1", "Dep. 2"]})
+    assert delta.preserva({"PARLAMENTAR": ["Dep. 2"], "MUNICÍPIO": ["Município 3"]})
+
+    antes, depois = (
+        dados_por_dimensao(versao[versao["PARLAMENTAR"] == "Dep. 2"], "MUNICÍPIO", "Soma de VALOR", 10)
+        for versao in (df_emendas, novo)
+    )
+    pd.testing.assert_frame_equal(antes, depois)
+
+
+class _StoreLento:
+    """Store de mentira: cada fonte leva `duracao` segundos; as de `falham` dão erro"""
+
+    def __init__(self, duracao, falham=()):
+        self.duracao = duracao
+        self.falham = set(falham)
+        self.erros = {}
+
+    def carregar(self, url, leitor, max_idade, timeout):
+        time.sleep(self.duracao)
+        if url in self.falham:
+            raise OSError("fonte fora do ar")
+        return pd.DataFrame({"Nº EMENDA": [url]})
+
+    def ler_meta(self, url):
+        return {"hash": url, "salvo_em": 0.0}
+
+    def ler(self, url, conteudo_hash=None):
+        return pd.DataFrame({"Nº EMENDA": [url]})
+
+
+def test_prazo_conta_do_inicio_de_cada_fonte():
+    fontes = [{"nome": f"F{i}", "url": f"u{i}"} for i in range(3)]
+    dataset = carregar_fontes(_StoreLento(0.3), fontes, max_workers=1, timeout=0.5)
+    assert dataset.erros_fontes == {}
+    assert dataset.df["Nº EMENDA"].tolist() == ["u0", "u1", "u2"]
+
+
+def test_erro_de_fonte_fica_no_atualizador_mesmo_sem_versao_nova():
+    fontes = [{"nome": "F", "url": "u"}]
+    store = _StoreLento(0)
+    atualizador = AtualizadorDados(lambda: carregar_fontes(store, fontes), intervalo=3600)
+    versao = atualizador.dataset.versao
+    verificado_em = atualizador.verificado_em
+
+    store.falham.add("u")  # passa a servir o snapshot, com a mesma versão
+    atualizador._atualizar()
+    assert atualizador.dataset.versao == versao
+    assert "fonte fora do ar" in atualizador.erros_fontes["F"]
+    assert atualizador.verificado_em == verificado_em
+
+
+class _Servidor:
+    """Servidor HTTP local que serve `conteudo`, com ETag opcional e respostas 304"""
+
+    def __init__(self):
+        self.conteudo = b"A,B\n1,x\n2,y\n"
+        self.com_etag = True
+        self.respostas = []  # status de cada requisição
+        servidor = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag = '"%s"' % hashlib.sha1(servidor.conteudo).hexdigest()
+                if servidor.com_etag and self.headers.get("If-None-Match") == etag:
+                    servidor.respostas.append(304)
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                servidor.respostas.append(200)
+                self.send_response(200)
+                if servidor.com_etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(servidor.conteudo)))
+                self.end_headers()
+                self.wfile.write(servidor.conteudo)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._http.server_address[1]}/emendas.csv"
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """Simula a rede fora do ar: a porta passa a recusar conexões"""
+        if self._thread is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._thread = None
+
+
+@pytest.fixture
+def servidor():
+    servidor = _Servidor()
+    yield servidor
+    servidor.parar()
+
+
+def _leitor_contado():
+    chamadas = []
+
+    def ler_contando(caminho):
+        chamadas.append(caminho)
+        return ler_csv(caminho)
+
+    return ler_contando, chamadas
+
+
+def test_baixar_csv_hash_e_304(servidor, tmp_path):
+    destino = tmp_path / "baixado.csv"
+    conteudo_hash, validadores = baixar_csv(servidor.url, destino)
+    assert conteudo_hash == hashlib.sha256(servidor.conteudo).hexdigest()
+    assert destino.read_bytes() == servidor.conteudo
+    assert baixar_csv(servidor.url, destino, etag=validadores["etag"]) == (None, validadores)
+    assert servidor.respostas == [200, 304]
+
+
+def test_primeiro_download_grava_snapshot(servidor, tmp_path):
+    store = SnapshotStore(tmp_path)
+    leitor, chamadas = _leitor_contado()
+    df = store.carregar(servidor.url, leitor, max_idade=0)
+    assert df["B"].tolist() == ["x", "y"] and len(chamadas) == 1
+    meta = store.ler_meta(servidor.url)
+    assert meta["leitor"] == "ler_contando" and meta["linhas"] == 2
+    assert meta["hash"] == hashlib.sha256(servidor.conteudo).hexdigest()
+    assert list(tmp_path.glob("*.parquet")) and not list(tmp_path.glob("*.csv"))
+
+
+@pytest.mark.parametrize("com_etag", [True, False], ids=["304", "mesmo-hash"])
+def test_conteudo_inalterado_nao_reprocessa(servidor, tmp_path, com_etag):
+    servidor.com_etag = com_etag
+    store = SnapshotStore(tmp_path)
+    leitor, chamadas = _leitor_contado()
+    primeiro = store.carregar(servidor.url, leitor, max_idade=0)
+    verificado_em = store.ler_meta(servidor.url)["verificado_em"]
+    time.sleep(0.01)
+
+    assert store.carregar(servidor.url, leitor, max_idade=0) is primeiro
+    assert len(chamadas) == 1
+    assert servidor.respostas == [200, 304 if com_etag else 200]
+    assert store.ler_meta(servidor.url)["verificado_em"] > verificado_em
+
+    servidor.conteudo += b"3,z\n"
+    assert store.carregar(servidor.url, leitor, max_idade=0)["B"].tolist() == ["x", "y", "z"]
+    assert len(chamadas) == 2
+
+
+def test_reinicio_sem_rede_serve_snapshot(servidor, tmp_path):
+    leitor, chamadas = _leitor_contado()
+    SnapshotStore(tmp_path).carregar(servidor.url, leitor, max_idade=0)
+    servidor.parar()
+
+    store = SnapshotStore(tmp_path)  # novo processo
+    assert store.carregar(servidor.url, leitor, max_idade=0)["B"].tolist() == ["x", "y"]
+    assert store.erros == {}  # primeira chamada não vai à rede
+    assert store.carregar(servidor.url, leitor, max_idade=0)["B"].tolist() == ["x", "y"]
+    assert servidor.url in store.erros  # revalidação falhou, snapshot continua servido
+    assert len(chamadas) == 1
+
+
+def test_sem_rede_e_sem_snapshot(servidor, tmp_path):
+    servidor.parar()
+    store = SnapshotStore(tmp_path)
+    with pytest.raises(OSError):
+        store.carregar(servidor.url, ler_csv)
+    assert servidor.url in store.erros
+    assert not list(tmp_path.iterdir())
+
+    fontes = [{"nome": "F", "url": servidor.url}]
+    with pytest.raises(RuntimeError, match="Nenhuma fonte"):
+        carregar_fontes(store, fontes, leitor=ler_csv, timeout=5)
+
+
+def test_troca_de_leitor_reconstroi_snapshot(servidor, tmp_path):
+    store = SnapshotStore(tmp_path)
+    leitor, chamadas = _leitor_contado()
+    store.carregar(servidor.url, leitor, max_idade=0)
+
+    def ler_maiusculo(caminho):
+        return ler_csv(caminho).assign(B=lambda d: d["B"].str.upper())
+
+    store = SnapshotStore(tmp_path)  # reinício: sem a troca, serviria o snapshot antigo
+    assert store.carregar(servidor.url, ler_maiusculo)["B"].tolist() == ["X", "Y"]
+    assert store.ler_meta(servidor.url)["leitor"] == "ler_maiusculo"
+    assert servidor.respostas == [200, 200]  # sem validadores: download completo
+    assert len(chamadas) == 1
@@ -0,0 +1,37 @@
+import io
+
+import pandas as pd
+
+from exportacao import conteudo_exportacao, escrever_csv, exportar
+
+
+def test_csv_em_blocos_igual_ao_to_csv(df_emendas, monkeypatch):
+    monkeypatch.setattr("exportacao.LINHAS_POR_BLOCO", 700)
+    destino = io.BytesIO()
+    escrever_csv(df_emendas, destino)
+    assert destino.getvalue() == df_emendas.to_csv(index=False).encode("utf-8")
+
+
+def test_versao_antiga_nao_apaga_exportacoes_da_atual(df_emendas, tmp_path):
+    atual = exportar(df_emendas, "CSV", "v2", "estado", tmp_path, versao_atual="v2")
+    antiga = exportar(df_emendas, "CSV", "v1", "estado", tmp_path, versao_atual="v2")
+    assert atual.exists() and antiga.exists()
+
+    outra = exportar(df_emendas.head(10), "Parquet", "v2", "outro", tmp_path, versao_atual="v2")
+    assert outra.exists() and not antiga.exists()
+    assert len(pd.read_parquet(outra)) == 10
+
+
+def test_conteudo_regerado_se_apagado_antes_da_leitura(df_emendas, tmp_path, monkeypatch):
+    chamadas = []
+
+    def apagado_por_outra_sessao(*args, **kwargs):
+        caminho = exportar(*args, **kwargs)
+        chamadas.append(caminho)
+        if len(chamadas) == 1:
+            caminho.unlink()
+        return caminho
+
+    monkeypatch.setattr("exportacao.exportar", apagado_por_outra_sessao)
+    conteudo = conteudo_exportacao(df_emendas, "CSV", "v1", "estado", diretorio=tmp_path)
+    assert len(chamadas) == 2 and conteudo.startswith(b"STATUS GERAL")
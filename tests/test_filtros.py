@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from filtros import MotorFiltros, chave_filtros
+
+COLUNAS = ["SUBAÇÃO", "ANO DA EMENDA", "PARLAMENTAR", "STATUS DA EMENDA", "MUNICÍPIO", "MODALIDADE"]
+INTERVALOS = ["VALOR", "ANO DA EMENDA", "DATA OB MS"]
+
+
+@pytest.fixture(scope="module")
+def motor(df_emendas):
+    return MotorFiltros(df_emendas, COLUNAS, colunas_intervalo=INTERVALOS)
+
+
+def _mascara(df, filtros, intervalos):
+    """Referência: filtros encadeados, como o painel fazia antes dos índices"""
+    mascara = pd.Series(True, index=df.index)
+    for coluna, valores in filtros.items():
+        mascara &= df[coluna].isin(valores)
+    for coluna, (minimo, maximo) in intervalos.items():
+        if pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            minimo, maximo = pd.Timestamp(minimo), pd.Timestamp(maximo)
+        mascara &= df[coluna].between(minimo, maximo).fillna(False).astype(bool)
+    return np.flatnonzero(mascara.to_numpy(dtype=bool))
+
+
+def _sortear_estado(df, rng):
+    filtros = {}
+    for coluna in rng.choice(COLUNAS, size=rng.integers(0, 4), replace=False):
+        distintos = df[coluna].dropna().unique()
+        filtros[coluna] = list(rng.choice(distintos, size=min(len(distintos), rng.integers(1, 4)), replace=False))
+    intervalos = {}
+    if rng.random() < 0.5:
+        intervalos["VALOR"] = tuple(sorted(rng.uniform(1_000, 2_000_000, 2)))
+    if rng.random() < 0.3:
+        inicio = pd.Timestamp(2021, 1, 1) + pd.Timedelta(days=int(rng.integers(0, 900)))
+        intervalos["DATA OB MS"] = (inicio.date(), (inicio + pd.Timedelta(days=200)).date())
+    return filtros, intervalos
+
+
+def test_um_valor_igual_ao_filtro_encadeado(df_emendas, motor):
+    for coluna in COLUNAS:
+        valor = df_emendas[coluna].dropna().iloc[0]
+        esperado = df_emendas[df_emendas[coluna] == valor]
+        assert motor.frame(motor.filtrar({coluna: [valor]})).equals(esperado)
+
+
+def test_sem_filtros_devolve_o_frame(df_emendas, motor):
+    assert motor.filtrar({}) is None
+    assert motor.frame(None) is df_emendas
+
+
+@pytest.mark.parametrize("semente", range(200))
+def test_filtrar_igual_as_mascaras(df_emendas, motor, semente):
+    filtros, intervalos = _sortear_estado(df_emendas, np.random.default_rng(semente))
+    posicoes = motor.filtrar(filtros, intervalos)
+    obtido = np.arange(len(df_emendas)) if posicoes is None else posicoes
+    assert np.array_equal(obtido, _mascara(df_emendas, filtros, intervalos))
+
+
+@pytest.mark.parametrize("semente", range(50))
+def test_opcoes_iguais_aos_distintos_filtrados(df_emendas, motor, semente):
+    filtros, intervalos = _sortear_estado(df_emendas, np.random.default_rng(semente))
+    sub = df_emendas.iloc[_mascara(df_emendas, filtros, intervalos)]
+    for coluna in COLUNAS:
+        assert motor.opcoes(coluna, filtros, intervalos) == sorted(sub[coluna].dropna().unique())
+
+
+def test_intervalo_inclusivo_e_sem_nulos(df_emendas, motor):
+    minimo, maximo = motor.limites("VALOR")
+    assert len(motor.filtrar({}, {"VALOR": (minimo, maximo)})) == df_emendas["VALOR"].notna().sum()
+
+
+def test_chave_filtros_independe_da_ordem():
+    assert chave_filtros({"A": ["x", "y"], "B": [2, 1]}) == chave_filtros({"B": [1, 2], "A": ["y", "x"]})
+    assert chave_filtros({"A": ["x"]}) != chave_filtros({"A": ["x"]}, busca="termo")
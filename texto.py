@@ -0,0 +1,72 @@
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Texto normalizado de EXECUÇÃO DA EMENDA -> situação exibida nos gráficos
+MAPA_EXECUCAO = {
+    "executada": "Executada",
+    "em execucao": "Em Execução",
+    "em execução": "Em Execução",
+    "nao executada": "Não Executada",
+    "não executada": "Não Executada"
+}
+CATEGORIAS_EXECUCAO = ["Em Execução", "Executada", "Não Executada", "Outros/Indef."]
+
+# Colunas de texto com chaves normalizadas pré-calculadas a cada versão dos dados (as da busca)
+COLUNAS_TEXTO = ["ENTIDADE", "SUBAÇÃO", "PENDÊNCIAS"]
+
+
+@lru_cache(maxsize=100_000)
+def normalizar_txt(s: str) -> str:
+    """Remove acentos e padroniza minúsculas para mapeamentos de texto."""
+    s = str(s).strip().lower()
+    return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("utf-8")
+
+
+def mapear_distintos(serie: pd.Series, funcao: Callable, categorias: Optional[Sequence] = None) -> pd.Series:
+    """
+    Aplica `funcao` só aos valores distintos da série (as categorias, no caso
+    de colunas category) e expande o resultado pelos códigos de cada linha.
+    Devolve uma série category; nulos continuam nulos.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, valores = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codigos, valores = pd.factorize(serie)
+    mapeados = pd.Categorical([funcao(v) for v in valores], categories=categorias)
+    novos = mapeados.codes[codigos] if len(valores) else np.full(len(codigos), -1, dtype=np.int8)
+    novos = np.where(codigos >= 0, novos, -1)
+    return pd.Series(pd.Categorical.from_codes(novos, mapeados.categories), index=serie.index, name=serie.name)
+
+
+def situacao_execucao(serie: pd.Series) -> pd.Series:
+    """Situação padronizada (CATEGORIAS_EXECUCAO) de cada valor de EXECUÇÃO DA EMENDA; nulos continuam nulos."""
+    return mapear_distintos(
+        serie, lambda v: MAPA_EXECUCAO.get(normalizar_txt(v), "Outros/Indef."), CATEGORIAS_EXECUCAO
+    )
+
+
+class TextoNormalizado:
+    """
+    Normalização de texto de uma versão dos dados, feita uma vez na carga e só
+    sobre os valores distintos: chaves normalizadas (sem acento, minúsculas) das
+    colunas de texto, com um código canônico por linha igual para grafias que só
+    diferem em acentos/caixa ("Em execução" e "EM EXECUCAO"), e a situação
+    padronizada de EXECUÇÃO DA EMENDA (`situacao`), usada pelo cubo e pelo banco SQL.
+    """
+
+    def __init__(self, df: pd.DataFrame, colunas: Sequence[str] = COLUNAS_TEXTO):
+        self.chaves: Dict[str, pd.Series] = {}
+        for coluna in colunas:
+            if coluna in df.columns:
+                self.chaves[coluna] = mapear_distintos(df[coluna], normalizar_txt)
+        self.situacao: Optional[pd.Series] = (
+            situacao_execucao(df["EXECUÇÃO DA EMENDA"]) if "EXECUÇÃO DA EMENDA" in df.columns else None
+        )
+
+    def codigos(self, coluna: str) -> np.ndarray:
+        """Código canônico de cada linha (-1 para nulos)"""
+        return self.chaves[coluna].cat.codes.to_numpy()